@@ -0,0 +1,66 @@
+"""2_sanction_entry
+
+Revision ID: 4d2b7c9e1a30
+Revises: 96f1fa4b9357
+Create Date: 2026-10-19 10:12:41.207318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4d2b7c9e1a30"
+down_revision: Union[str, None] = "96f1fa4b9357"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table(
+        "sanction_entry",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("source", sa.String(length=64), nullable=False),
+        sa.Column("list_version", sa.String(length=64), nullable=False),
+        sa.Column("name", sa.Text(), nullable=False),
+        sa.Column("name_lower", sa.Text(), nullable=False),
+        sa.Column("match_key", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_sanction_entry_source",
+        "sanction_entry",
+        ["source"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_sanction_entry_name_lower_trgm",
+        "sanction_entry",
+        ["name_lower"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name_lower": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_sanction_entry_match_key_trgm",
+        "sanction_entry",
+        ["match_key"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"match_key": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_sanction_entry_match_key_trgm", table_name="sanction_entry"
+    )
+    op.drop_index(
+        "ix_sanction_entry_name_lower_trgm", table_name="sanction_entry"
+    )
+    op.drop_index("ix_sanction_entry_source", table_name="sanction_entry")
+    op.drop_table("sanction_entry")
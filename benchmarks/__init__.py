@@ -0,0 +1,10 @@
+"""
+Benchmarks of the matching pipeline. Run them from the repository root:
+
+    python -m benchmarks.<name> --help
+"""
+
+from testkit import set_default_env
+
+# Benchmarks never connect to the services
+set_default_env(TRACE_EXPORTER="none")
@@ -0,0 +1,77 @@
+"""
+Indexed cross-script matching against an exhaustive scan.
+
+A synthetic Latin list is matched with Cyrillic uploads, a share of
+which spell listed names. The indexed matching of compiled candidates
+(SimilarityIndex cascades and phonetic shortlists) is timed against
+scoring every upload with every name and match key. Both must find
+the same companies.
+
+Usage:
+    python -m benchmarks.cross_script [--candidates 1000] [--uploads 100]
+"""
+
+import time
+import random
+import argparse
+from src.core.config import settings
+from src.utils.web_scraper import compile_candidates, match_companies
+from testkit import exhaustive_matches, random_name, to_cyrillic
+
+
+def build_data(args) -> tuple[list[str], list[str]]:
+    """Returns a Latin list and Cyrillic uploads with some listed names."""
+    rng = random.Random(args.seed)
+    listed = [random_name(rng).upper() for _ in range(args.candidates)]
+    uploads = [
+        to_cyrillic(
+            rng.choice(listed)
+            if rng.random() < args.listed_share
+            else random_name(rng)
+        )
+        for _ in range(args.uploads)
+    ]
+    return listed, uploads
+
+
+def best_time(func, repeat: int) -> tuple[float, list[str]]:
+    """Returns the fastest of repeated runs and the result of the last."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--candidates", type=int, default=1_000)
+    parser.add_argument("--uploads", type=int, default=100)
+    parser.add_argument("--listed-share", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    listed, uploads = build_data(args)
+    threshold = settings.MATCH_THRESHOLD
+    compiled = compile_candidates(listed)
+    indexed, found = best_time(
+        lambda: match_companies(uploads, compiled, threshold), args.repeat
+    )
+    exhaustive, expected = best_time(
+        lambda: exhaustive_matches(uploads, listed, compiled.keys, threshold),
+        args.repeat,
+    )
+    if found != expected:
+        raise SystemExit("Indexed matching differs from the exhaustive scan")
+    print(
+        f"{len(listed)} candidates, {len(uploads)} uploads, "
+        f"{len(found)} matched"
+    )
+    print(f"indexed     {indexed * 1000:>9.1f}ms")
+    print(f"exhaustive  {exhaustive * 1000:>9.1f}ms")
+    print(f"speedup     {exhaustive / indexed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Throughput of matching one large upload with 1, 2, 4 and 8 processes.
+
+A synthetic sanctions list and upload are matched through the fair
+scheduler and the matching pool, the same way a check does. Each core
+count runs twice: the cold run includes starting the pool and loading
+the list in every process, the warm run shows steady throughput.
+Results of every run are compared with the single-process run.
+
+Usage:
+    python -m benchmarks.matching_scaling [--cores 1 2 4 8]
+"""
+
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from src.core.config import settings
+from src.services.job_scheduler import FairScheduler
+from src.utils.web_scraper import (
+    cache_candidates,
+    compile_candidates,
+    match_chunk,
+    shutdown_match_executor,
+)
+from testkit import random_name
+
+def build_data(args) -> tuple[list[str], list[str]]:
+    """Returns a synthetic list and an upload with some listed names."""
+    rng = random.Random(args.seed)
+    candidates = [random_name(rng) for _ in range(args.candidates)]
+    companies = [
+        (
+            rng.choice(candidates)
+            if rng.random() < args.match_share
+            else random_name(rng)
+        )
+        for _ in range(args.companies)
+    ]
+    return candidates, companies
+
+
+async def run_matching(cores: int, companies: list[str], args) -> list[str]:
+    """Matches the upload in chunks through the scheduler."""
+    scheduler = FairScheduler(workers=cores, per_user_limit=cores)
+    chunks = [
+        companies[i : i + args.chunk_size]
+        for i in range(0, len(companies), args.chunk_size)
+    ]
+    outputs = await asyncio.gather(
+        *(
+            scheduler.submit(
+                1,
+                match_chunk,
+                chunk,
+                {"BENCH": "benchmark"},
+                settings.MATCH_THRESHOLD,
+                cost=len(chunk),
+            )
+            for chunk in chunks
+        )
+    )
+    return [company for found, _ in outputs for company in found["BENCH"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cores", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--candidates", type=int, default=50_000)
+    parser.add_argument("--companies", type=int, default=4_000)
+    parser.add_argument("--match-share", type=float, default=0.05)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    candidates, companies = build_data(args)
+    compiled = compile_candidates(candidates)
+    print(
+        f"{len(candidates)} candidates, {len(companies)} companies, "
+        f"chunks of {args.chunk_size}"
+    )
+    print(f"{'cores':>5}{'cold':>9}{'warm':>9}{'rows/s':>10}{'speedup':>9}")
+    reference, base = None, None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Matching processes read their settings from the environment
+        os.environ["TMP_DIR_SCRAPER"] = settings.TMP_DIR_SCRAPER = tmp_dir
+        settings.MATCH_USE_PROCESSES = True
+        for cores in args.cores:
+            settings.MATCH_WORKERS = cores
+            cache_candidates("BENCH", "benchmark", compiled)
+            timings = []
+            for _ in range(2):
+                started = time.perf_counter()
+                found = asyncio.run(run_matching(cores, companies, args))
+                timings.append(time.perf_counter() - started)
+                if reference is None:
+                    reference = found
+                elif found != reference:
+                    raise SystemExit(f"Results with {cores} cores differ")
+            shutdown_match_executor()
+            base = base or timings[1]
+            print(
+                f"{cores:>5}{timings[0]:>8.2f}s{timings[1]:>8.2f}s"
+                f"{len(companies) / timings[1]:>10.0f}"
+                f"{base / timings[1]:>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Simulation of the fair scheduler with mixed job sizes.
+
+Large jobs start first and small jobs keep arriving while they run.
+Chunks sleep for a time proportional to their size instead of matching,
+so the numbers show the scheduling alone. The same workload runs twice:
+with every job as its own user (fair queue) and with all jobs as one
+user, which turns the queue into plain FIFO.
+
+Usage:
+    python -m benchmarks.scheduler_simulation [--workers 4] [--seed 1]
+"""
+
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from src.core.config import settings
+from src.services.job_scheduler import FairScheduler
+from testkit import percentile
+
+
+def build_workload(args) -> list[tuple[float, int, str]]:
+    """Returns (arrival second, rows, kind) of every simulated job."""
+    rng = random.Random(args.seed)
+    jobs = [(0.0, args.large_rows, "large")] * args.large_jobs
+    jobs += [
+        (rng.uniform(0, args.arrival_window), args.small_rows, "small")
+        for _ in range(args.small_jobs)
+    ]
+    return sorted(jobs)
+
+
+async def run_job(
+    scheduler: FairScheduler,
+    user_id: int,
+    rows: int,
+    arrival: float,
+    started: float,
+    args,
+) -> float:
+    """Submits the chunks of one job on arrival and returns its latency."""
+    await asyncio.sleep(max(arrival - (time.perf_counter() - started), 0))
+    submitted = time.perf_counter()
+    sizes = [
+        min(args.chunk_size, rows - start)
+        for start in range(0, rows, args.chunk_size)
+    ]
+    await asyncio.gather(
+        *(
+            scheduler.submit(
+                user_id, time.sleep, size * args.row_seconds, cost=size
+            )
+            for size in sizes
+        )
+    )
+    return time.perf_counter() - submitted
+
+
+async def simulate(mode: str, workload, args) -> dict[str, list[float]]:
+    """Runs the workload and returns job latencies by kind."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.workers))
+    if mode == "fifo":
+        scheduler = FairScheduler(args.workers, per_user_limit=args.workers)
+    else:
+        scheduler = FairScheduler(args.workers, per_user_limit=args.limit)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(
+        *(
+            run_job(
+                scheduler,
+                0 if mode == "fifo" else user_id,
+                rows,
+                arrival,
+                started,
+                args,
+            )
+            for user_id, (arrival, rows, _) in enumerate(workload)
+        )
+    )
+    by_kind: dict[str, list[float]] = {}
+    for (_, _, kind), latency in zip(workload, latencies):
+        by_kind.setdefault(kind, []).append(latency)
+    return by_kind
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--limit", type=int, default=settings.MATCH_USER_CONCURRENCY
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--row-seconds", type=float, default=0.0002)
+    parser.add_argument("--large-jobs", type=int, default=2)
+    parser.add_argument("--large-rows", type=int, default=20_000)
+    parser.add_argument("--small-jobs", type=int, default=30)
+    parser.add_argument("--small-rows", type=int, default=100)
+    parser.add_argument("--arrival-window", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    # Chunks are sleeps, so threads stand in for matching processes
+    settings.MATCH_USE_PROCESSES = False
+    workload = build_workload(args)
+    print(f"{'mode':<6}{'kind':<7}{'jobs':>5}{'p50':>9}{'p95':>9}{'max':>9}")
+    for mode in ("fair", "fifo"):
+        by_kind = asyncio.run(simulate(mode, workload, args))
+        for kind, values in sorted(by_kind.items()):
+            print(
+                f"{mode:<6}{kind:<7}{len(values):>5}"
+                f"{percentile(values, 50):>8.2f}s"
+                f"{percentile(values, 95):>8.2f}s"
+                f"{max(values):>8.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Load tests of the whole bot against a fake Bot API. Run them from the
+repository root:
+
+    python -m loadtest.<name> --help
+"""
+
+from testkit import set_default_env
+
+# The bot process inherits these; load tests never connect to the services
+set_default_env()
@@ -0,0 +1,200 @@
+"""
+Stand-in for the Telegram Bot API used by the load harness.
+
+The bot is pointed at it with TELEGRAM_API_URL. Updates queued by the
+harness are returned by getUpdates (or pushed to the webhook by the
+harness itself), uploaded files are served like the Bot API file
+endpoint and everything the bot sends is recorded per chat.
+"""
+
+import time
+import asyncio
+import itertools
+from collections import Counter
+from aiohttp import web
+
+
+class FakeTelegram:
+    """Bot API methods the bot uses, served from memory."""
+
+    def __init__(self, token: str):
+        self.token = token
+        self.calls: Counter = Counter()
+        self.first_poll: float | None = None
+        self._updates: list[dict] = []
+        self._new_update = asyncio.Event()
+        self._files: dict[str, bytes] = {}
+        self._outbox: dict[int, asyncio.Queue] = {}
+        self._ids = itertools.count(1)
+
+    def app(self) -> web.Application:
+        """Returns the aiohttp application with the Bot API routes."""
+        app = web.Application(client_max_size=1024**3)
+        app.router.add_route(
+            "*", f"/bot{self.token}/{{method}}", self._handle_method
+        )
+        app.router.add_get(
+            f"/file/bot{self.token}/{{path:.+}}", self._handle_file
+        )
+        return app
+
+    def user(self, user_id: int) -> dict:
+        """Returns the Telegram user object of a simulated user."""
+        return {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"User {user_id}",
+        }
+
+    def add_update(self, **update) -> int:
+        """Queues an update for getUpdates and returns its update_id."""
+        update_id = next(self._ids)
+        self._updates.append({"update_id": update_id, **update})
+        self._new_update.set()
+        return update_id
+
+    def message_update(self, user_id: int, **fields) -> dict:
+        """Builds the message part of an update sent by a user."""
+        return {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self.user(user_id),
+            **fields,
+        }
+
+    def callback_update(self, user_id: int, data: str) -> dict:
+        """Builds the callback query of an inline button pressed by a user."""
+        return {
+            "id": str(next(self._ids)),
+            "from": self.user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": next(self._ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "text": "Main Menu",
+            },
+        }
+
+    def add_file(self, content: bytes, file_name: str) -> dict:
+        """Stores an upload and returns its Telegram document object."""
+        file_id = f"file{next(self._ids)}"
+        self._files[file_id] = content
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id,
+            "file_name": file_name,
+            "file_size": len(content),
+        }
+
+    async def next_sent(self, chat_id: int, timeout: float) -> dict:
+        """Waits for the next message or document the bot sends to a chat."""
+        return await asyncio.wait_for(self._chat(chat_id).get(), timeout)
+
+    def _chat(self, chat_id: int) -> asyncio.Queue:
+        return self._outbox.setdefault(chat_id, asyncio.Queue())
+
+    async def _handle_file(self, request: web.Request) -> web.Response:
+        file_id = request.match_info["path"].rsplit("/", 1)[-1]
+        if file_id not in self._files:
+            raise web.HTTPNotFound()
+        return web.Response(body=self._files[file_id])
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params = dict(request.query)
+        if request.can_read_body:
+            params.update(await request.post())
+        handler = getattr(self, f"_{method}", None)
+        result = await handler(params) if handler else True
+        if isinstance(result, web.Response):
+            return result
+        return web.json_response({"ok": True, "result": result})
+
+    async def _getMe(self, params: dict) -> dict:
+        return {
+            "id": 1,
+            "is_bot": True,
+            "first_name": "Sanctions Bot",
+            "username": "sanctions_load_bot",
+        }
+
+    async def _getUpdates(self, params: dict) -> list[dict]:
+        if self.first_poll is None:
+            self.first_poll = time.perf_counter()
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        deadline = time.monotonic() + float(params.get("timeout", 0))
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        while not self._updates and time.monotonic() < deadline:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(
+                    self._new_update.wait(), deadline - time.monotonic()
+                )
+            except asyncio.TimeoutError:
+                break
+        return self._updates[:limit]
+
+    async def _getFile(self, params: dict) -> dict:
+        file_id = params["file_id"]
+        if file_id not in self._files:
+            return web.json_response(
+                {"ok": False, "error_code": 400, "description": "no file"},
+                status=400,
+            )
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id,
+            "file_size": len(self._files[file_id]),
+            "file_path": f"documents/{file_id}",
+        }
+
+    async def _sendMessage(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        self._chat(chat_id).put_nowait(
+            {
+                "method": "sendMessage",
+                "text": params.get("text", ""),
+                "at": time.perf_counter(),
+            }
+        )
+        return self._bot_message(chat_id, text=params.get("text", ""))
+
+    async def _sendDocument(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        document = params["document"]
+        # Files are sent as multipart fields referenced by "attach://<field>"
+        if isinstance(document, str):
+            document = params[document.removeprefix("attach://")]
+        size = len(document.file.read())
+        self._chat(chat_id).put_nowait(
+            {
+                "method": "sendDocument",
+                "file_name": document.filename,
+                "size": size,
+                "caption": params.get("caption", ""),
+                "at": time.perf_counter(),
+            }
+        )
+        return self._bot_message(
+            chat_id,
+            document={
+                "file_id": f"sent{next(self._ids)}",
+                "file_unique_id": f"sent{next(self._ids)}",
+                "file_name": document.filename,
+                "file_size": size,
+            },
+        )
+
+    def _bot_message(self, chat_id: int, **fields) -> dict:
+        return {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Sanctions Bot"},
+            **fields,
+        }
@@ -0,0 +1,114 @@
+"""
+Synthetic sanctions lists and uploads for the load harness.
+
+Every configured source gets a file in the format its loader expects,
+served by a local HTTP server in place of the official URLs. Uploads
+mix listed names, Cyrillic spellings and names that match nothing.
+"""
+
+import io
+import random
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+from aiohttp import web
+from testkit import random_name
+
+CYRILLIC_NAMES = [
+    "ООО Ромашка",
+    "АО Северный Ветер",
+    "ПАО Газпромнефть",
+    "ООО Техснаб",
+    "ЗАО Мега Строй",
+]
+SOURCE_EXTENSIONS = {
+    "OFAC": ".csv",
+    "EU": ".xml",
+    "UK": ".xml",
+    "UN": ".xml",
+    "EU-Tracker": ".html",
+    "UN-SC": ".xml",
+}
+
+
+def render_list(source: str, names: list[str]) -> str:
+    """Renders names in the file format of a sanctions source."""
+    if source == "OFAC":
+        return "".join(
+            f'{i},"{name}","-0-"\n' for i, name in enumerate(names, 1)
+        )
+    if source == "UK":
+        rows = "".join(
+            f"<Designation><Names><Name><Name6>{escape(name)}</Name6>"
+            "</Name></Names></Designation>\n"
+            for name in names
+        )
+        return f"<Designations>\n{rows}</Designations>\n"
+    if source in ("UN", "UN-SC"):
+        rows = "".join(
+            f"<INDIVIDUAL><FIRST_NAME>{escape(name)}</FIRST_NAME>"
+            "</INDIVIDUAL>\n"
+            for name in names
+        )
+        return (
+            "<CONSOLIDATED_LIST><INDIVIDUALS>\n"
+            f"{rows}</INDIVIDUALS></CONSOLIDATED_LIST>\n"
+        )
+    if source == "EU-Tracker":
+        rows = "".join(
+            f"<li><a title={quoteattr(name)}>{escape(name)}</a></li>\n"
+            for name in names
+        )
+        return f"<html><body><ul>\n{rows}</ul></body></html>\n"
+    rows = "".join(
+        f"<entity><name>{escape(name)}</name></entity>\n" for name in names
+    )
+    return f"<export>\n{rows}</export>\n"
+
+
+def write_lists(
+    directory: Path, list_size: int, seed: int
+) -> tuple[dict[str, dict], list[str]]:
+    """
+    Writes one synthetic list per source and returns the
+    SANCTIONS_SOURCES entries without URLs and all listed names.
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    sources, listed = {}, []
+    for source, ext in SOURCE_EXTENSIONS.items():
+        names = [random_name(rng) for _ in range(list_size)]
+        if source == "EU":
+            names += CYRILLIC_NAMES
+        (directory / f"{source}{ext}").write_text(
+            render_list(source, names), encoding="utf-8"
+        )
+        sources[source] = {"path": f"{source}{ext}", "ext": ext}
+        listed += names
+    return sources, listed
+
+
+def build_upload(
+    listed: list[str], rows: int, match_share: float, seed: int
+) -> bytes:
+    """Returns an .xlsx upload with a share of listed names."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Company"])
+    for _ in range(rows):
+        if rng.random() < match_share:
+            sheet.append([rng.choice(listed)])
+        else:
+            sheet.append([random_name(rng)])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def lists_app(directory: Path) -> web.Application:
+    """Returns an application serving the list files like their sources."""
+    app = web.Application()
+    app.router.add_static("/lists", directory)
+    return app
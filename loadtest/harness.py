@@ -0,0 +1,282 @@
+"""
+End-to-end load test of the bot with simulated users.
+
+The real bot (python -m src.main) runs in a subprocess against a fake
+Bot API and a local server with synthetic sanctions lists. Every
+simulated user goes through user_handlers.router like a person would:
+presses "Company sanctions", picks a report format and uploads an .xlsx
+file. Users start evenly over the ramp-up period. Reported are job
+latency from upload to report (p50/p95/p99), throughput and memory of
+the bot with its matching processes over time.
+
+Usage:
+    python -m loadtest.harness [--users 200] [--ramp 60] [--rows 200]
+        [--json report.json] [--bot-env MATCH_WORKERS=2 ...]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from aiohttp import web
+from loadtest.fake_telegram import FakeTelegram
+from loadtest.fixtures import build_upload, lists_app, write_lists
+from src.utils.memory import tree_rss
+from testkit import percentile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BOT_TOKEN = "123456:LOADTEST"
+
+
+async def start_site(app: web.Application) -> tuple[web.AppRunner, str]:
+    """Serves an application on a free local port and returns its URL."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+def bot_environment(api_url: str, **overrides: str) -> dict[str, str]:
+    """
+    Returns the environment of the bot process: the fake Bot API and
+    FSM state in memory, so neither Telegram nor Redis is needed.
+    """
+    env = dict(os.environ)
+    env.update(
+        PYTHONPATH=str(REPO_ROOT),
+        BOT_TOKEN=BOT_TOKEN,
+        TELEGRAM_API_URL=api_url,
+        FSM_STORAGE="memory",
+        BOT_MODE="polling",
+    )
+    env.update(overrides)
+    return env
+
+
+async def start_bot(
+    workdir: Path, env: dict[str, str]
+) -> asyncio.subprocess.Process:
+    """Starts the bot in workdir, logging to workdir/bot.log."""
+    with open(workdir / "bot.log", "wb") as log:
+        return await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "src.main",
+            cwd=workdir,
+            env=env,
+            stdout=log,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+
+
+async def stop_bot(process: asyncio.subprocess.Process, timeout: float = 15):
+    """Stops the bot gracefully, killing it if it does not exit in time."""
+    if process.returncode is not None:
+        return
+    process.send_signal(signal.SIGINT)
+    try:
+        await asyncio.wait_for(process.wait(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def wait_for_first_poll(
+    api: FakeTelegram, process: asyncio.subprocess.Process, timeout: float
+):
+    """Waits until the bot asks for updates for the first time."""
+    deadline = time.monotonic() + timeout
+    while api.first_poll is None:
+        if process.returncode is not None:
+            raise RuntimeError("The bot exited before polling, see bot.log")
+        if time.monotonic() > deadline:
+            raise RuntimeError("The bot did not start polling in time")
+        await asyncio.sleep(0.05)
+
+
+async def run_user(
+    api: FakeTelegram, user_id: int, upload: bytes, delay: float, args
+) -> dict:
+    """Goes through the sanctions check as one user."""
+    await asyncio.sleep(delay)
+    result = {"user": user_id, "ok": False}
+    try:
+        for data in ("sanctions_company", f"format_{args.format}"):
+            api.add_update(callback_query=api.callback_update(user_id, data))
+            await api.next_sent(user_id, args.timeout)
+        document = api.add_file(upload, f"companies_{user_id}.xlsx")
+        uploaded = time.perf_counter()
+        api.add_update(message=api.message_update(user_id, document=document))
+        received = await api.next_sent(user_id, args.timeout)
+        reply = await api.next_sent(user_id, args.timeout)
+    except asyncio.TimeoutError:
+        result["error"] = "timeout"
+        return result
+    result.update(
+        ok=reply["method"] == "sendDocument",
+        received=received["at"] - uploaded,
+        latency=reply["at"] - uploaded,
+        finished=reply["at"],
+    )
+    if not result["ok"]:
+        result["error"] = reply["text"]
+    return result
+
+
+async def sample_memory(
+    pid: int, started: float, results: list, interval: float
+) -> list[dict]:
+    """Records memory of the bot process tree until cancelled."""
+    timeline = []
+    try:
+        while True:
+            timeline.append(
+                {
+                    "second": round(time.perf_counter() - started, 1),
+                    "rss_mb": round(tree_rss(pid) / 1024**2, 1),
+                    "jobs_done": len(results),
+                }
+            )
+            await asyncio.sleep(interval)
+    except (asyncio.CancelledError, FileNotFoundError, ProcessLookupError):
+        return timeline
+
+
+def summarize(results: list[dict], timeline: list[dict], args) -> dict:
+    """Builds the report of the run."""
+    done = [r for r in results if r["ok"]]
+    latencies = [r["latency"] for r in done]
+    report = {
+        "users": args.users,
+        "rows_per_upload": args.rows,
+        "completed": len(done),
+        "failed": len(results) - len(done),
+        "errors": sorted({r["error"] for r in results if not r["ok"]}),
+        "timeline": timeline,
+    }
+    if latencies:
+        first = min(r["finished"] - r["latency"] for r in done)
+        elapsed = max(r["finished"] for r in done) - first
+        report["jobs_per_minute"] = round(len(done) / elapsed * 60, 1)
+        report["rows_per_second"] = round(len(done) * args.rows / elapsed)
+        report["latency_seconds"] = {
+            f"p{q}": round(percentile(latencies, q), 2) for q in (50, 95, 99)
+        }
+        report["latency_seconds"]["max"] = round(max(latencies), 2)
+        report["received_p95_seconds"] = round(
+            percentile([r["received"] for r in done], 95), 2
+        )
+    if timeline:
+        report["peak_rss_mb"] = max(s["rss_mb"] for s in timeline)
+    return report
+
+
+def print_report(report: dict):
+    """Prints the report, with memory at most every tenth of the run."""
+    print(
+        f"{report['completed']} of {report['users']} jobs completed, "
+        f"{report['failed']} failed"
+    )
+    for error in report["errors"]:
+        print(f"  error: {error}")
+    if "latency_seconds" in report:
+        latency = report["latency_seconds"]
+        print(
+            f"throughput: {report['jobs_per_minute']} jobs/min, "
+            f"{report['rows_per_second']} rows/s"
+        )
+        print(
+            f"latency: p50 {latency['p50']}s, p95 {latency['p95']}s, "
+            f"p99 {latency['p99']}s, max {latency['max']}s"
+        )
+    timeline = report["timeline"]
+    if timeline:
+        print(f"memory: peak {report['peak_rss_mb']} MB")
+        print(f"{'second':>8}{'rss MB':>9}{'jobs done':>11}")
+        for sample in timeline[:: max(len(timeline) // 10, 1)]:
+            print(
+                f"{sample['second']:>8}{sample['rss_mb']:>9}"
+                f"{sample['jobs_done']:>11}"
+            )
+
+
+async def run(args) -> dict:
+    """Runs the bot with the fixture servers and the simulated users."""
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="loadtest-"))
+    sources, listed = write_lists(workdir / "lists", args.list_size, args.seed)
+    lists_runner, lists_url = await start_site(lists_app(workdir / "lists"))
+    api = FakeTelegram(BOT_TOKEN)
+    api_runner, api_url = await start_site(api.app())
+    for source in sources.values():
+        source["url"] = f"{lists_url}/lists/{source.pop('path')}"
+    env = bot_environment(
+        api_url,
+        SANCTIONS_SOURCES=json.dumps(sources),
+        **dict(item.split("=", 1) for item in args.bot_env),
+    )
+    uploads = [
+        build_upload(listed, args.rows, args.match_share, args.seed + i)
+        for i in range(args.users)
+    ]
+    process = await start_bot(workdir, env)
+    print(f"Bot started in {workdir}, log in bot.log")
+    try:
+        await wait_for_first_poll(api, process, args.timeout)
+        started = time.perf_counter()
+        results = []
+        sampler = asyncio.create_task(
+            sample_memory(process.pid, started, results, args.sample_interval)
+        )
+
+        async def user(i: int):
+            results.append(
+                await run_user(
+                    api, 1000 + i, uploads[i], i * args.ramp / args.users, args
+                )
+            )
+
+        await asyncio.gather(*(user(i) for i in range(args.users)))
+        sampler.cancel()
+        timeline = await sampler
+    finally:
+        await stop_bot(process)
+        await api_runner.cleanup()
+        await lists_runner.cleanup()
+    return summarize(results, timeline, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--ramp", type=float, default=60)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--match-share", type=float, default=0.05)
+    parser.add_argument("--list-size", type=int, default=5_000)
+    parser.add_argument("--format", default="xlsx")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", help="kept after the run")
+    parser.add_argument("--json", help="also write the report here")
+    parser.add_argument(
+        "--bot-env",
+        nargs="*",
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra settings of the bot",
+    )
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
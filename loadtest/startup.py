@@ -0,0 +1,100 @@
+"""
+Startup time of the bot: import time of src.main and time-to-first-poll.
+
+Import time is measured in a fresh interpreter, which also reports data
+libraries from HEAVY_MODULES that were imported eagerly; they should
+only be loaded after startup. Time-to-first-poll is the time from
+starting python -m src.main to its first getUpdates call to the fake
+Bot API, which is what a rolling restart waits for.
+
+Usage:
+    python -m loadtest.startup [--runs 5]
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from loadtest.fake_telegram import FakeTelegram
+from loadtest.harness import (
+    BOT_TOKEN,
+    bot_environment,
+    start_bot,
+    start_site,
+    stop_bot,
+)
+
+IMPORT_SCRIPT = """
+import sys, json, time
+started = time.perf_counter()
+import src.main
+from src.core.config import settings
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "eager": [m for m in settings.HEAVY_MODULES if m in sys.modules],
+}))
+"""
+
+
+def measure_import(env: dict[str, str]) -> dict:
+    """Imports src.main in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+async def measure_first_poll(workdir: Path, timeout: float) -> float:
+    """Starts the bot and returns the seconds until its first poll."""
+    api = FakeTelegram(BOT_TOKEN)
+    runner, api_url = await start_site(api.app())
+    started = time.perf_counter()
+    process = await start_bot(workdir, bot_environment(api_url))
+    try:
+        while api.first_poll is None:
+            if process.returncode is not None:
+                raise RuntimeError(f"The bot exited, see {workdir}/bot.log")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("The bot did not start polling in time")
+            await asyncio.sleep(0.01)
+        return api.first_poll - started
+    finally:
+        await stop_bot(process)
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+    imports = [measure_import(bot_environment("")) for _ in range(args.runs)]
+    eager = sorted({module for run in imports for module in run["eager"]})
+    with tempfile.TemporaryDirectory() as workdir:
+        polls = [
+            asyncio.run(measure_first_poll(Path(workdir), args.timeout))
+            for _ in range(args.runs)
+        ]
+    print(f"{'':<16}{'median':>9}{'max':>9}")
+    for label, values in (
+        ("import src.main", [run["seconds"] for run in imports]),
+        ("first poll", polls),
+    ):
+        print(
+            f"{label:<16}{statistics.median(values):>8.2f}s"
+            f"{max(values):>8.2f}s"
+        )
+    print(f"heavy modules imported eagerly: {', '.join(eager) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Load test of the webhook server with synthetic updates.
+
+The bot runs in webhook mode against the fake Bot API. Synthetic /help
+messages from distinct users are posted to the webhook with the secret
+token, a fixed number at a time. Reported are accepted updates per
+second, HTTP latency of the webhook (p50/p99) and the end-to-end latency
+from posting an update to the bot's reply (p50/p99).
+
+Usage:
+    python -m loadtest.webhook [--updates 5000] [--concurrency 100]
+"""
+
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+import aiohttp
+from loadtest.fake_telegram import FakeTelegram
+from loadtest.harness import (
+    BOT_TOKEN,
+    bot_environment,
+    start_bot,
+    start_site,
+    stop_bot,
+)
+from testkit import percentile
+
+WEBHOOK_SECRET = "loadtest-secret"
+
+
+def free_port() -> int:
+    """Returns a local TCP port that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_webhook(
+    api: FakeTelegram,
+    process: asyncio.subprocess.Process,
+    session: aiohttp.ClientSession,
+    base_url: str,
+    timeout: float,
+):
+    """Waits until the webhook is registered and the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.returncode is not None:
+            raise RuntimeError("The bot exited before serving, see bot.log")
+        if api.calls["setWebhook"]:
+            try:
+                async with session.get(f"{base_url}/healthz") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientConnectionError:
+                pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("The webhook server did not start in time")
+
+
+async def post_update(
+    api: FakeTelegram,
+    session: aiohttp.ClientSession,
+    url: str,
+    user_id: int,
+    timeout: float,
+) -> dict:
+    """Posts a /help message and waits for the reply."""
+    update = {
+        "update_id": user_id,
+        "message": api.message_update(
+            user_id,
+            text="/help",
+            entities=[{"type": "bot_command", "offset": 0, "length": 5}],
+        ),
+    }
+    started = time.perf_counter()
+    async with session.post(
+        url,
+        json=update,
+        headers={"X-Telegram-Bot-Api-Secret-Token": WEBHOOK_SECRET},
+    ) as response:
+        status = response.status
+    accepted = time.perf_counter()
+    if status != 200:
+        return {"status": status}
+    try:
+        reply = await api.next_sent(user_id, timeout)
+    except asyncio.TimeoutError:
+        return {"status": status, "http": accepted - started}
+    return {
+        "status": status,
+        "http": accepted - started,
+        "e2e": reply["at"] - started,
+    }
+
+
+async def run(args) -> tuple[list[dict], float]:
+    """Runs the bot in webhook mode and posts the updates."""
+    api = FakeTelegram(BOT_TOKEN)
+    api_runner, api_url = await start_site(api.app())
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = bot_environment(
+        api_url,
+        BOT_MODE="webhook",
+        WEBHOOK_BASE_URL=base_url,
+        WEBHOOK_SECRET=WEBHOOK_SECRET,
+        WEB_SERVER_HOST="127.0.0.1",
+        WEB_SERVER_PORT=str(port),
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        process = await start_bot(Path(workdir), env)
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                await wait_for_webhook(
+                    api, process, session, base_url, args.timeout
+                )
+                url = f"{base_url}{env.get('WEBHOOK_PATH', '/webhook')}"
+                semaphore = asyncio.Semaphore(args.concurrency)
+
+                async def send(user_id: int) -> dict:
+                    async with semaphore:
+                        return await post_update(
+                            api, session, url, user_id, args.timeout
+                        )
+
+                started = time.perf_counter()
+                results = await asyncio.gather(
+                    *(send(1000 + i) for i in range(args.updates))
+                )
+                elapsed = time.perf_counter() - started
+        finally:
+            await stop_bot(process)
+            await api_runner.cleanup()
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+    results, elapsed = asyncio.run(run(args))
+    accepted = [r for r in results if r["status"] == 200]
+    replied = [r["e2e"] for r in accepted if "e2e" in r]
+    print(
+        f"{len(accepted)} of {len(results)} updates accepted, "
+        f"{len(replied)} replied, {len(accepted) / elapsed:.0f} updates/s"
+    )
+    for label, values in (
+        ("webhook HTTP", [r["http"] for r in accepted]),
+        ("update to reply", replied),
+    ):
+        if values:
+            print(
+                f"{label:<16}p50 {percentile(values, 50) * 1000:.1f}ms, "
+                f"p99 {percentile(values, 99) * 1000:.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
+from pydantic import ConfigDict, Field, model_validator
 from pathlib import Path
+import os
+
+
+def available_cpus() -> int:
+    """Returns the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
 
 
 class Settings(BaseSettings):
@@ -15,6 +24,20 @@ class Settings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
 
+    # FSM state storage: "redis", or "memory" for a single local process
+    FSM_STORAGE: str = "redis"
+
+    # Base URL of a self-hosted or stand-in Bot API server, e.g. for load tests
+    TELEGRAM_API_URL: str = ""
+
+    # "polling" for a single process, "webhook" for replicas behind a LB
+    BOT_MODE: str = "polling"
+    WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEB_SERVER_HOST: str = "0.0.0.0"
+    WEB_SERVER_PORT: int = 8080
+
     MAIN_MENU_BOT: dict = {
         "/start": "Start the bot",
         "/menu": "Main menu",
@@ -25,6 +48,71 @@ class Settings(BaseSettings):
     TMP_DIR_SCRAPER: str = "tmp/scraper_uploads"
     RESULT_DIR: str = "results"
 
+    # Report formats offered in the bot menu: callback value -> button text
+    REPORT_FORMATS: dict[str, str] = {
+        "xlsx": "Excel",
+        "csv": "CSV",
+        "parquet": "Parquet",
+        "jsonl": "JSON Lines",
+    }
+    # Reports above this size are zipped before sending
+    TELEGRAM_UPLOAD_LIMIT_MB: int = 50
+
+    # Snapshot bundle imported at startup, see src/services/snapshot.py.
+    # In offline mode lists are never downloaded, only taken from disk.
+    SNAPSHOT_PATH: str = ""
+    SNAPSHOT_OFFLINE: bool = False
+
+    # Span export of every job: "none", "file" (JSON Lines) or "otlp"
+    TRACE_EXPORTER: str = "file"
+    TRACE_FILE: str = "logs/traces/spans.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+
+    # Memory growth of the bot and its matching processes allowed during
+    # a check; 0 disables the budget
+    JOB_MEMORY_BUDGET_MB: int = 1024
+
+    # Sanctions list downloads: timeouts in seconds, attempts with backoff
+    DOWNLOAD_CONNECT_TIMEOUT: float = 10
+    DOWNLOAD_READ_TIMEOUT: float = 60
+    DOWNLOAD_RETRIES: int = Field(default=3, ge=1)
+    DOWNLOAD_BACKOFF: float = 2.0
+    DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    # Minimal token_set_ratio score for a name to count as a match
+    MATCH_THRESHOLD: int = 85
+
+    # "memory" scans parsed lists in the bot, "postgres" shortlists
+    # candidates with pg_trgm indexes before the RapidFuzz confirmation
+    MATCH_BACKEND: str = "memory"
+    PG_TRGM_SIMILARITY: float = 0.3
+
+    # Uploads are split into chunks that are fairly scheduled across users
+    MATCH_CHUNK_SIZE: int = 500
+    # Every matching process holds all compiled lists; set this to the CPU
+    # quota of the container, as only CPU affinity is detected
+    MATCH_WORKERS: int = available_cpus()
+    # Run chunks in a process pool so matching uses several cores
+    MATCH_USE_PROCESSES: bool = True
+    # Chunks of one user run at once while other users have chunks queued;
+    # with no one else waiting, a user gets every idle worker
+    MATCH_USER_CONCURRENCY: int = 2
+
+    # Reports reused when the same upload is checked against the same lists
+    REPORT_CACHE_DIR: str = "cache/reports"
+    REPORT_CACHE_MAX_FILES: int = 200
+    REPORT_CACHE_TTL_HOURS: int = 24
+
+    # Data libraries imported in a background thread after startup
+    PRELOAD_MODULES: bool = True
+    HEAVY_MODULES: list[str] = [
+        "pandas",
+        "openpyxl",
+        "bs4",
+        "requests",
+        "rapidfuzz",
+    ]
+
     SANCTIONS_SOURCES: dict[str, dict] = {
         "OFAC": {
             "url": "https://www.treasury.gov/ofac/downloads/sdn.csv",
@@ -62,6 +150,15 @@ class Settings(BaseSettings):
         },
     }
 
+    @model_validator(mode="after")
+    def check_webhook_url(self):
+        """Webhook mode needs a public URL to register with Telegram."""
+        if self.BOT_MODE == "webhook" and not self.WEBHOOK_BASE_URL:
+            raise ValueError(
+                "WEBHOOK_BASE_URL is required when BOT_MODE is webhook"
+            )
+        return self
+
     model_config = ConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env",
         env_file_encoding="utf-8",
@@ -1,6 +1,7 @@
 import logging
 import logging.config
 import os
+import copy
 import glob
 from datetime import datetime, timedelta
 from logging.handlers import TimedRotatingFileHandler
@@ -19,10 +20,10 @@ class ErrorLogFilter(logging.Filter):
         return record.levelno >= logging.ERROR
 
 
-def clean_old_logs(log_dir, days=30):
+def clean_old_logs(log_dir, days=30, pattern="*.log*"):
     """Function for automatic log cleaning"""
     now = datetime.now()
-    for file_path in glob.glob(os.path.join(log_dir, "*.log*")):
+    for file_path in glob.glob(os.path.join(log_dir, pattern)):
         try:
             mtime = os.path.getmtime(file_path)
             file_time = datetime.fromtimestamp(mtime)
@@ -35,7 +36,7 @@ def clean_old_logs(log_dir, days=30):
 class DailyRotatingFileHandler(TimedRotatingFileHandler):
     """Handler for moving logs"""
 
-    def __init__(self, log_dir, filename, **kwargs):
+    def __init__(self, log_dir, filename, clean_pattern="*.log*", **kwargs):
         os.makedirs(log_dir, exist_ok=True)
         full_path = os.path.join(log_dir, filename)
         super().__init__(
@@ -47,11 +48,12 @@ class DailyRotatingFileHandler(TimedRotatingFileHandler):
             **kwargs,
         )
         self.log_dir = log_dir
+        self.clean_pattern = clean_pattern
         self.suffix = "%Y-%m-%d"
 
     def doRollover(self):
         super().doRollover()
-        clean_old_logs(self.log_dir, days=30)
+        clean_old_logs(self.log_dir, days=30, pattern=self.clean_pattern)
 
 
 # Config logger
@@ -62,14 +64,17 @@ logging_config = {
         "default": {
             "format": (
                 "%(filename)s:%(lineno)d #%(levelname)-8s "
-                "[%(asctime)s] - %(name)s - %(message)s"
+                "[%(asctime)s] [job %(job_id)s] - %(name)s - %(message)s"
             )
         },
     },
     "filters": {
         "error_filter": {
             "()": ErrorLogFilter,
-        }
+        },
+        "job_id": {
+            "()": "src.core.tracing.JobIdFilter",
+        },
     },
     "handlers": {
         "file": {
@@ -78,6 +83,7 @@ logging_config = {
             "filename": "app.log",
             "level": "INFO",
             "formatter": "default",
+            "filters": ["job_id"],
         },
         "error_file": {
             "()": DailyRotatingFileHandler,
@@ -85,13 +91,49 @@ logging_config = {
             "filename": "error.log",
             "level": "ERROR",
             "formatter": "default",
-            "filters": ["error_filter"],
+            "filters": ["error_filter", "job_id"],
         },
         "console": {
             "class": "logging.StreamHandler",
             "level": "INFO",
             "formatter": "default",
+            "filters": ["job_id"],
         },
     },
     "root": {"level": "INFO", "handlers": ["file", "error_file", "console"]},
 }
+
+
+def worker_logging_config() -> dict:
+    """
+    Config of matching processes: they write to the same log files,
+    leave rotation to the bot and reopen the files once rotated
+    """
+    config = copy.deepcopy(logging_config)
+    for name in ("file", "error_file"):
+        handler = config["handlers"][name]
+        del handler["()"]
+        handler.update(
+            {
+                "class": "logging.handlers.WatchedFileHandler",
+                "filename": os.path.join(
+                    handler.pop("log_dir"), handler["filename"]
+                ),
+                "encoding": "utf-8",
+            }
+        )
+    return config
+
+
+_logging_configured = False
+
+
+def setup_logging(worker: bool = False):
+    """Applies the logging config once per process"""
+    global _logging_configured
+    if _logging_configured:
+        return
+    logging.config.dictConfig(
+        worker_logging_config() if worker else logging_config
+    )
+    _logging_configured = True
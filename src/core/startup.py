@@ -0,0 +1,9 @@
+import time
+
+# Captured on first import so main.py can report time-to-first-poll
+STARTED_AT = time.perf_counter()
+
+
+def seconds_since_start() -> float:
+    """Returns the number of seconds passed since the bot process started"""
+    return time.perf_counter() - STARTED_AT
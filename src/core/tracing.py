@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from src.core.config import settings
+
+
+logger = logging.getLogger(name="tracing")
+
+# Job id doubles as the trace id, so it has the 32 hex digits OTLP expects
+job_id_var: ContextVar[str | None] = ContextVar("job_id", default=None)
+_current_span_id: ContextVar[str | None] = ContextVar(
+    "current_span_id", default=None
+)
+# Trace of spans opened outside a job, e.g. in the snapshot CLI
+_current_trace_id: ContextVar[str | None] = ContextVar(
+    "current_trace_id", default=None
+)
+
+
+class JobIdFilter(logging.Filter):
+    """Adds the id of the current job to every log record"""
+
+    def filter(self, record):
+        record.job_id = job_id_var.get() or "-"
+        return True
+
+
+def start_job() -> str:
+    """Creates a job id for the current context and returns it."""
+    job_id = uuid.uuid4().hex
+    job_id_var.set(job_id)
+    return job_id
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Records a span of the current job. Spans opened inside the block,
+    including in threads started with asyncio.to_thread, become its
+    children. Outside a job the outermost span starts a new trace.
+    """
+    span_id = os.urandom(8).hex()
+    parent_id = _current_span_id.get()
+    trace_id = job_id_var.get() or _current_trace_id.get() or uuid.uuid4().hex
+    token = _current_span_id.set(span_id)
+    trace_token = _current_trace_id.set(trace_id)
+    start = time.time_ns()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException as e:
+        status = "error"
+        attributes["error"] = repr(e)
+        raise
+    finally:
+        _current_span_id.reset(token)
+        _current_trace_id.reset(trace_token)
+        _export(
+            {
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "parent_span_id": parent_id,
+                "name": name,
+                "start_time_unix_nano": start,
+                "end_time_unix_nano": time.time_ns(),
+                "status": status,
+                "attributes": attributes,
+            }
+        )
+
+
+class _FileExporter:
+    """
+    Appends finished spans to a JSON Lines file, which is rotated at
+    midnight and cleaned up like the logs
+    """
+
+    def __init__(self, path: str):
+        from src.core.logger import DailyRotatingFileHandler
+
+        path = Path(path)
+        self._handler = DailyRotatingFileHandler(
+            str(path.parent), path.name, clean_pattern=f"{path.name}*"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def export(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        self._handler.handle(logging.makeLogRecord({"msg": line}))
+
+
+class _OtlpExporter:
+    """Sends spans in batches to an OTLP/HTTP JSON collector"""
+
+    def __init__(self, endpoint: str, batch_size: int = 100):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=10_000)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def export(self, record: dict):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("Trace queue is full, dropping span")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + 1
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(
+                        self._queue.get(
+                            timeout=max(deadline - time.monotonic(), 0)
+                        )
+                    )
+                except queue.Empty:
+                    break
+            self._send(batch)
+
+    def _send(self, batch: list[dict]):
+        import requests
+
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", "sanctions_bot")
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "src.core.tracing"},
+                            "spans": [_otlp_span(r) for r in batch],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            requests.post(self.endpoint, json=payload, timeout=5)
+        except Exception as e:
+            logger.warning(f"Could not export {len(batch)} spans: {e}")
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    """Converts an attribute to the OTLP JSON representation."""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(record: dict) -> dict:
+    """Converts a span record to the OTLP JSON representation."""
+    return {
+        "traceId": record["trace_id"],
+        "spanId": record["span_id"],
+        "parentSpanId": record["parent_span_id"] or "",
+        "name": record["name"],
+        "kind": 1,
+        "startTimeUnixNano": str(record["start_time_unix_nano"]),
+        "endTimeUnixNano": str(record["end_time_unix_nano"]),
+        "attributes": [
+            _otlp_attribute(key, value)
+            for key, value in record["attributes"].items()
+        ],
+        "status": {"code": 2 if record["status"] == "error" else 1},
+    }
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _export(record: dict):
+    """Passes a finished span to the configured exporter."""
+    global _exporter
+    if settings.TRACE_EXPORTER == "none":
+        return
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                if settings.TRACE_EXPORTER == "otlp":
+                    _exporter = _OtlpExporter(settings.TRACE_OTLP_ENDPOINT)
+                else:
+                    _exporter = _FileExporter(settings.TRACE_FILE)
+    _exporter.export(record)
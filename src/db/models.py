@@ -1,4 +1,4 @@
-from sqlalchemy import func, BigInteger
+from sqlalchemy import func, BigInteger, Index, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from datetime import datetime
 
@@ -29,3 +29,35 @@ class User(Base, TimeStampedMixin):
 
     def __repr__(self):
         return str(self.id)
+
+
+class SanctionEntry(Base):
+    """Parsed sanctions list entry, searchable through trigram indexes"""
+
+    __tablename__ = "sanction_entry"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    source: Mapped[str] = mapped_column(String(64), nullable=False)
+    list_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    name: Mapped[str] = mapped_column(Text, nullable=False)
+    name_lower: Mapped[str] = mapped_column(Text, nullable=False)
+    match_key: Mapped[str] = mapped_column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sanction_entry_source", "source"),
+        Index(
+            "ix_sanction_entry_name_lower_trgm",
+            "name_lower",
+            postgresql_using="gin",
+            postgresql_ops={"name_lower": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_sanction_entry_match_key_trgm",
+            "match_key",
+            postgresql_using="gin",
+            postgresql_ops={"match_key": "gin_trgm_ops"},
+        ),
+    )
+
+    def __repr__(self):
+        return str(self.id)
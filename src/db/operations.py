@@ -1,12 +1,9 @@
 import logging
-import logging.config
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.models import User
-from src.core.logger import logging_config
+from src.db.models import SanctionEntry, User
 
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger("db_operations")
 
 
@@ -114,3 +111,141 @@ class UserDAO(BaseDAO):
                 f"An error occurred while fetching User by Telegram ID: {e}",
             )
             raise e
+
+
+class SanctionEntryDAO(BaseDAO):
+    """Class with operations for SanctionEntry model"""
+
+    model = SanctionEntry
+
+    @classmethod
+    async def get_list_version(cls, session: AsyncSession, source: str):
+        """Get the version of a sanctions list stored in the table"""
+        try:
+            query = (
+                select(cls.model.list_version)
+                .where(cls.model.source == source)
+                .limit(1)
+            )
+            result = await session.execute(query)
+            return result.scalar_one_or_none()
+        except Exception as e:
+            logger.error(
+                f"An error occurred while fetching version of {source}: {e}",
+            )
+            raise e
+
+    @classmethod
+    async def replace_source(
+        cls,
+        session: AsyncSession,
+        source: str,
+        list_version: str,
+        records: list[tuple[str, str, str]],
+    ):
+        """
+        Replace all entries of a sanctions list with bulk COPY.
+        Records are (name, name_lower, match_key) tuples.
+        """
+        try:
+            # Serializes replicas loading the same list at the same time
+            await session.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext(source)))
+            )
+            if await cls.get_list_version(session, source) == list_version:
+                await session.rollback()
+                return
+            await session.execute(
+                delete(cls.model).where(cls.model.source == source)
+            )
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                cls.model.__tablename__,
+                records=(
+                    (source, list_version, *record) for record in records
+                ),
+                columns=[
+                    "source",
+                    "list_version",
+                    "name",
+                    "name_lower",
+                    "match_key",
+                ],
+            )
+            # COPY leaves new rows in the pending lists of the GIN indexes,
+            # which the planner prices above a full scan with trigram checks
+            for index in cls.model.__table__.indexes:
+                if index.dialect_options["postgresql"]["using"] == "gin":
+                    await session.execute(
+                        select(func.gin_clean_pending_list(index.name))
+                    )
+            await session.execute(text(f"ANALYZE {cls.model.__tablename__}"))
+            await session.commit()
+            logger.info(f"Loaded {len(records)} entries of {source}")
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error loading entries of {source}: {e}")
+            raise e
+
+    @classmethod
+    async def shortlist(
+        cls,
+        session: AsyncSession,
+        source: str,
+        names: list[str],
+        keys: list[str],
+        similarity: float,
+    ) -> list[list[str]]:
+        """
+        Get candidate names similar to each of the given names, using the
+        trigram indexes on lowercased names and transliterated match keys.
+        Every condition can use the indexes: names or keys that are
+        similar or contain the given one, and keys similar to one of its
+        tokens, for listed names that are a small part of a long name.
+        """
+        try:
+            for setting in (
+                "pg_trgm.similarity_threshold",
+                "pg_trgm.word_similarity_threshold",
+            ):
+                await session.execute(
+                    select(func.set_config(setting, str(similarity), True))
+                )
+            query = text(
+                """
+                SELECT q.idx, e.name
+                FROM unnest(CAST(:names AS text[]), CAST(:keys AS text[]))
+                    WITH ORDINALITY AS q(name, key, idx)
+                JOIN sanction_entry AS e ON e.source = :source AND (
+                    e.name_lower % q.name
+                    OR e.name_lower %> q.name
+                    OR e.match_key % NULLIF(q.key, '')
+                    OR e.match_key %> NULLIF(q.key, '')
+                )
+                UNION
+                SELECT q.idx, e.name
+                FROM unnest(CAST(:keys AS text[]))
+                    WITH ORDINALITY AS q(key, idx)
+                CROSS JOIN LATERAL unnest(string_to_array(q.key, ' ')) AS t
+                JOIN sanction_entry AS e
+                    ON e.source = :source AND e.match_key % t
+                """
+            )
+            result = await session.execute(
+                query,
+                {
+                    "names": [name.lower() for name in names],
+                    "keys": keys,
+                    "source": source,
+                },
+            )
+            shortlists = [[] for _ in names]
+            for idx, name in result:
+                shortlists[idx - 1].append(name)
+            await session.commit()
+            return shortlists
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error shortlisting entries of {source}: {e}")
+            raise e
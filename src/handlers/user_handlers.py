@@ -10,12 +10,14 @@ from src.db.operations import UserDAO
 from src.keyboards.inline.keyboard import generate_inline_keyboard
 from src.services.sanctions_service import check_sanctions
 from src.core.config import settings
+from src.core.tracing import span, start_job
 
 
 router: Router = Router()
 
 
 class FSMSanctionCompany(StatesGroup):
+    wait_format = State()
     wait_file = State()
 
 
@@ -88,9 +90,47 @@ async def help_handler(
     await message.answer("Tehnical support - @teenchain")
 
 
+def report_format_keyboard():
+    return generate_inline_keyboard(
+        2,
+        **{
+            f"format_{key}": text
+            for key, text in settings.REPORT_FORMATS.items()
+        },
+    )
+
+
 @router.callback_query(F.data == "sanctions_company")
 async def sanctions_company(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
+    await callback.message.answer(
+        text="Choose the format of the report with results.",
+        reply_markup=report_format_keyboard(),
+    )
+    await state.set_state(FSMSanctionCompany.wait_format)
+
+
+# Handler on a file sent before the report format was chosen
+@router.message(StateFilter(FSMSanctionCompany.wait_format), F.document)
+async def file_before_format(message: Message):
+    await message.answer(
+        text=(
+            "Choose the format of the report first, then send the file "
+            "with companies again."
+        ),
+        reply_markup=report_format_keyboard(),
+    )
+
+
+@router.callback_query(
+    StateFilter(FSMSanctionCompany.wait_format), F.data.startswith("format_")
+)
+async def report_format_chosen(callback: CallbackQuery, state: FSMContext):
+    await callback.answer()
+    report_format = callback.data.removeprefix("format_")
+    if report_format not in settings.REPORT_FORMATS:
+        return
+    await state.update_data(report_format=report_format)
     await callback.message.answer(
         text=(
             "Paste the file with companies in <b>.xls or .xlsx</b> format and "
@@ -117,15 +157,23 @@ async def process_file(message: Message, state: FSMContext, bot: Bot):
             "Please send a file in <b>.xls or .xlsx</b> format."
         )
         return
-    os.makedirs(settings.TMP_DIR_BOT, exist_ok=True)
-    date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    unique_filename = f"{file_root}_{date_str}{file_ext}"
-    file_path = os.path.join(settings.TMP_DIR_BOT, unique_filename)
-    await message.bot.download(document, destination=file_path)
-    await message.answer("The file has been received and is being processed.")
-    await state.clear()
-    await check_sanctions(
-        uploaded_file_path=file_path,
-        chat_id=message.from_user.id,
-        bot=bot,
-    )
+    job_id = start_job()
+    with span("process_file", file_name=file_name):
+        os.makedirs(settings.TMP_DIR_BOT, exist_ok=True)
+        date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        unique_filename = f"{file_root}_{date_str}{file_ext}"
+        file_path = os.path.join(settings.TMP_DIR_BOT, unique_filename)
+        with span("download_upload"):
+            await message.bot.download(document, destination=file_path)
+        await message.answer(
+            "The file has been received and is being processed. "
+            f"Job ID: <code>{job_id}</code>"
+        )
+        data = await state.get_data()
+        await state.clear()
+        await check_sanctions(
+            uploaded_file_path=file_path,
+            chat_id=message.from_user.id,
+            bot=bot,
+            report_format=data.get("report_format", "xlsx"),
+        )
@@ -1,41 +1,168 @@
+from src.core.startup import seconds_since_start
 import asyncio
+import importlib
 import logging
-import logging.config
+from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
-from src.core.logger import logging_config
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.webhook.aiohttp_server import (
+    SimpleRequestHandler,
+    setup_application,
+)
+from src.core.logger import setup_logging
 from src.keyboards.set_main_menu_bot import set_main_menu
 from src.handlers import user_handlers
 from src.db.connect import AsyncSessionLocal
 from src.utils.middlewares import DBSessionMiddleware
+from src.utils.web_scraper import (
+    shutdown_match_executor,
+    warm_up_match_executor,
+)
+from src.services.snapshot import import_snapshot
 from src.core.config import settings
 
 
 logger = logging.getLogger(__name__)
 
 
+def preload_heavy_modules():
+    """
+    Imports data libraries that the bot loads lazily, so the first
+    sanctions check does not pay for their import time.
+    """
+    for module in settings.HEAVY_MODULES:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Could not preload {module}: {e}")
+    logger.info(
+        f"Heavy modules preloaded in {seconds_since_start():.2f}s "
+        "since start"
+    )
+
+
+def create_session() -> AiohttpSession | None:
+    """
+    Points the bot at TELEGRAM_API_URL when it is set, so it can run
+    against a local Bot API server instead of api.telegram.org.
+    """
+    if not settings.TELEGRAM_API_URL:
+        return None
+    logger.info(f"Using Bot API server at {settings.TELEGRAM_API_URL}")
+    return AiohttpSession(
+        api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL)
+    )
+
+
+def create_storage() -> BaseStorage:
+    """
+    Creates the FSM storage. Redis shares user state between replicas,
+    memory keeps it in this process, e.g. for local load tests.
+    """
+    if settings.FSM_STORAGE == "memory":
+        return MemoryStorage()
+    from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+
+    return RedisStorage.from_url(
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0",
+        key_builder=DefaultKeyBuilder(with_destiny=True),
+    )
+
+
+async def on_startup():
+    """Reports how long the bot took to become ready for updates"""
+    logger.info(f"Ready for updates in {seconds_since_start():.2f}s")
+    loop = asyncio.get_running_loop()
+    if settings.PRELOAD_MODULES:
+        loop.run_in_executor(None, preload_heavy_modules)
+    loop.run_in_executor(None, warm_up_match_executor)
+
+
+async def set_webhook(bot: Bot, dispatcher: Dispatcher):
+    """
+    Registers the webhook URL. Every replica sets the same URL, so the
+    call is idempotent and pending updates are kept for the other replicas.
+    """
+    await bot.set_webhook(
+        url=f"{settings.WEBHOOK_BASE_URL}{settings.WEBHOOK_PATH}",
+        secret_token=settings.WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        drop_pending_updates=False,
+    )
+    logger.info("Webhook registered")
+
+
+async def health_handler(request: web.Request) -> web.Response:
+    """Liveness endpoint for the load balancer"""
+    return web.Response(text="ok")
+
+
+async def run_polling(bot: Bot, dp: Dispatcher):
+    """Receives updates with long polling in a single process"""
+    await bot.delete_webhook(drop_pending_updates=True)
+    await dp.start_polling(bot)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Serves updates pushed by Telegram through an aiohttp server"""
+    dp.startup.register(set_webhook)
+    app = web.Application()
+    app.router.add_get("/healthz", health_handler)
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.WEBHOOK_SECRET or None,
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        host=settings.WEB_SERVER_HOST,
+        port=settings.WEB_SERVER_PORT,
+    )
+    await site.start()
+    logger.info(
+        f"Webhook server listening on "
+        f"{settings.WEB_SERVER_HOST}:{settings.WEB_SERVER_PORT}"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def main():
-    logging.config.dictConfig(logging_config)
-    logger.info("Starting BOTV")
+    setup_logging()
+    logger.info(f"Starting BOTV in {settings.BOT_MODE} mode")
+    if settings.SNAPSHOT_PATH:
+        try:
+            await asyncio.to_thread(import_snapshot, settings.SNAPSHOT_PATH)
+        except Exception as e:
+            logger.error(f"Failed to import snapshot: {e}", exc_info=True)
     bot: Bot = Bot(
         token=settings.BOT_TOKEN,
+        session=create_session(),
         default=DefaultBotProperties(parse_mode="HTML"),
     )
-    storage = RedisStorage.from_url(
-        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0",
-        key_builder=DefaultKeyBuilder(with_destiny=True),
-    )
-    dp: Dispatcher = Dispatcher(storage=storage)
+    dp: Dispatcher = Dispatcher(storage=create_storage())
+    dp.startup.register(on_startup)
     await set_main_menu(bot)
     dp.update.middleware(DBSessionMiddleware(AsyncSessionLocal))
     dp.include_router(user_handlers.router)
-    await bot.delete_webhook(drop_pending_updates=True)
     try:
-        await dp.start_polling(bot)
+        if settings.BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            await run_polling(bot, dp)
     except Exception as e:
         logger.error(f"[Exception] - {e}", exc_info=True)
     finally:
+        shutdown_match_executor()
         await bot.session.close()
 
 
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import contextvars
+from collections import defaultdict, deque
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+from src.core.config import settings
+from src.utils.web_scraper import discard_match_executor, get_match_executor
+
+
+logger = logging.getLogger(name="job_scheduler")
+
+
+class FairScheduler:
+    """
+    Weighted fair queue for matching chunks of all users.
+
+    Every chunk gets a virtual finish time equal to
+    max(virtual clock, previous finish time of the user) + cost / weight.
+    A free worker always takes the chunk with the smallest finish time
+    among users that are below their concurrency limit, so a small job
+    is served between the chunks of a large one instead of after it.
+    The limit only applies while other users have chunks waiting: when
+    everyone with queued chunks is at the limit, a free worker still takes
+    one of them, so a single large upload can use every worker.
+    Workers serve all jobs, so they start with an empty context and run
+    every chunk in the context of the job that submitted it.
+    """
+
+    def __init__(self, workers: int, per_user_limit: int):
+        self.workers = workers
+        self.per_user_limit = per_user_limit
+        self._queues: dict[int, deque] = defaultdict(deque)
+        self._last_finish: dict[int, float] = defaultdict(float)
+        self._running: dict[int, int] = defaultdict(int)
+        self._virtual_time = 0.0
+        self._condition: asyncio.Condition | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+
+    async def submit(
+        self,
+        user_id: int,
+        func: Callable,
+        *args: Any,
+        cost: float = 1.0,
+        weight: float = 1.0,
+    ) -> Any:
+        """Queues a blocking function call and waits for its result."""
+        self._start_workers()
+        future = asyncio.get_running_loop().create_future()
+        context = contextvars.copy_context()
+        async with self._condition:
+            start = max(self._virtual_time, self._last_finish[user_id])
+            finish = start + cost / weight
+            self._last_finish[user_id] = finish
+            self._queues[user_id].append(
+                (start, finish, func, args, context, future)
+            )
+            self._condition.notify()
+        return await future
+
+    def _start_workers(self):
+        """Creates worker tasks on first use inside the running loop."""
+        if self._worker_tasks:
+            return
+        self._condition = asyncio.Condition()
+        # Not the context of the job whose chunk happened to come first
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), context=contextvars.Context())
+            for _ in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} matching workers")
+
+    def _next_user(self) -> int | None:
+        """
+        Finds the user whose head chunk has the smallest finish time,
+        preferring users below their concurrency limit.
+        """
+        best_user, best_key = None, None
+        for user_id, queue in self._queues.items():
+            if not queue:
+                continue
+            at_limit = self._running[user_id] >= self.per_user_limit
+            key = (at_limit, queue[0][1])
+            if best_key is None or key < best_key:
+                best_user, best_key = user_id, key
+        return best_user
+
+    def _forget_idle_user(self, user_id: int):
+        """Drops bookkeeping of users with nothing queued or running."""
+        if not self._queues[user_id] and not self._running[user_id]:
+            del self._queues[user_id]
+            del self._running[user_id]
+            self._last_finish.pop(user_id, None)
+
+    async def _worker(self):
+        """Runs queued chunks one by one in the matching pool."""
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: self._next_user() is not None
+                )
+                user_id = self._next_user()
+                start, _, func, args, context, future = self._queues[
+                    user_id
+                ].popleft()
+                self._running[user_id] += 1
+                self._virtual_time = max(self._virtual_time, start)
+            try:
+                if not future.cancelled():
+                    loop = asyncio.get_running_loop()
+                    executor = get_match_executor()
+                    # run_in_executor drops context variables; a context
+                    # cannot be pickled, so it only follows chunks to threads
+                    if executor is None:
+                        func, args = context.run, (func, *args)
+                    try:
+                        result = await loop.run_in_executor(
+                            executor, func, *args
+                        )
+                    except BrokenProcessPool:
+                        discard_match_executor(executor)
+                        raise
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                async with self._condition:
+                    self._running[user_id] -= 1
+                    self._forget_idle_user(user_id)
+                    self._condition.notify_all()
+
+
+scheduler = FairScheduler(
+    workers=settings.MATCH_WORKERS,
+    per_user_limit=settings.MATCH_USER_CONCURRENCY,
+)
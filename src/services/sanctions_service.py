@@ -1,75 +1,469 @@
 import os
 import asyncio
-import logging.config
+import logging
+from collections import Counter
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 from aiogram import Bot
 from aiogram.types import FSInputFile
 from pathlib import Path
 from src.core.config import settings
-from src.core.logger import logging_config
+from src.core.tracing import span
 from src.utils.text_utils import normalize_company_name
 from src.utils.file_handlers import (
+    ReportTooLarge,
+    iter_result_rows,
     load_companies_from_excel,
-    save_results_to_excel,
-    clean_tmp_folders,
+    open_report,
+    remove_upload,
 )
-from src.utils.web_scraper import search_matches, download_file
+from src.utils.report_cache import (
+    file_sha256,
+    build_report_key,
+    get_cached_report,
+    store_report,
+)
+from src.utils.memory import (
+    MemoryBudgetExceeded,
+    MemoryTracker,
+    estimate_job_memory,
+)
+from src.utils.web_scraper import (
+    CandidateList,
+    cache_candidates,
+    compile_candidates,
+    download_file,
+    get_cached_candidates,
+    load_candidates,
+    match_chunk,
+)
+from src.services.job_scheduler import scheduler
+from src.services.trigram_backend import load_source, match_source
+from src.db.connect import AsyncSessionLocal
 
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger(name="sanctions_scraper")
 
 
-async def check_sanctions(uploaded_file_path: str, chat_id: int, bot: Bot):
+def source_path(name: str) -> Path:
+    """Returns where the downloaded sanctions list is stored."""
+    ext = settings.SANCTIONS_SOURCES[name]["ext"]
+    return Path(f"{settings.TMP_DIR_SCRAPER}/{name}{ext}")
+
+
+def get_compiled_source(
+    name: str, version: str, streaming: bool = False
+) -> CandidateList:
+    """
+    Returns the parsed list with match keys, building it only when the
+    list version differs from the one compiled before.
+    """
+    compiled = get_cached_candidates(name, version)
+    if compiled is None:
+        ext = settings.SANCTIONS_SOURCES[name]["ext"]
+        compiled = compile_candidates(
+            load_candidates(source_path(name), name, ext, streaming)
+        )
+        logger.info(f"Compiled {len(compiled.names)} candidates of {name}")
+    cache_candidates(name, version, compiled)
+    return compiled
+
+
+def set_compiled_source(name: str, version: str, compiled: CandidateList):
+    """Registers candidates compiled elsewhere, e.g. in a snapshot."""
+    cache_candidates(name, version, compiled)
+
+
+async def download_sources() -> dict[str, str]:
+    """
+    Downloads all sanctions lists and returns the content hash of each
+    available list. A list that cannot be downloaded falls back to the
+    copy already on disk, e.g. one imported from a snapshot bundle.
+    """
+    os.makedirs(settings.TMP_DIR_SCRAPER, exist_ok=True)
+    versions = {}
+    for name, source in settings.SANCTIONS_SOURCES.items():
+        url = source["url"]
+        file_path = source_path(name)
+        if settings.SNAPSHOT_OFFLINE:
+            if file_path.exists():
+                versions[name] = await asyncio.to_thread(
+                    file_sha256, file_path
+                )
+            continue
+        logger.info(f"Downloading {name} sanctions list from {url}")
+        try:
+            with span("download_file", source=name, url=url) as attrs:
+                versions[name] = await asyncio.to_thread(
+                    download_file, url, file_path
+                )
+                attrs["sha256"] = versions[name]
+        except Exception as e:
+            logger.error(f"Failed to download {name}: {e}", exc_info=True)
+            if file_path.exists():
+                logger.warning(f"Using the last available copy of {name}")
+                versions[name] = await asyncio.to_thread(
+                    file_sha256, file_path
+                )
+    return versions
+
+
+async def match_in_chunks(
+    companies: list[str],
+    source_versions: dict[str, str],
+    user_id: int,
+    chunk_size: int | None = None,
+    tracker: MemoryTracker | None = None,
+    on_chunk: Callable[[slice, dict], Awaitable] | None = None,
+) -> dict[str, list[str] | None]:
+    """
+    Splits companies into chunks, runs them through the fair scheduler
+    and merges chunk results back in the original order. Chunks carry
+    only list versions, the lists themselves are loaded by the workers.
+    Lists without a compiled version are reported as None, i.e. not checked.
+    The memory budget of the tracker is checked after every chunk.
+    on_chunk receives the rows of every finished chunk and its results,
+    in chunk order.
+    """
+    size = chunk_size or settings.MATCH_CHUNK_SIZE
+    chunks = [
+        companies[i : i + size] for i in range(0, len(companies), size)
+    ]
+    logger.info(f"Matching {len(companies)} companies in {len(chunks)} chunks")
+    finished = {}
+    next_chunk = 0
+    delivering = asyncio.Lock()
+
+    def by_source(found: dict) -> dict[str, list[str] | None]:
+        return {
+            name: found[name] if name in source_versions else None
+            for name in settings.SANCTIONS_SOURCES
+        }
+
+    async def deliver(index: int, found: dict):
+        nonlocal next_chunk
+        finished[index] = found
+        # Chunks finish out of order, later ones wait for their turn
+        async with delivering:
+            while next_chunk in finished:
+                start = next_chunk * size
+                rows = slice(start, start + len(chunks[next_chunk]))
+                await on_chunk(rows, by_source(finished.pop(next_chunk)))
+                next_chunk += 1
+
+    async def run_chunk(index: int, chunk: list[str]):
+        with span("match_chunk", index=index, size=len(chunk)):
+            output = await scheduler.submit(
+                user_id,
+                match_chunk,
+                chunk,
+                source_versions,
+                settings.MATCH_THRESHOLD,
+                cost=len(chunk),
+            )
+        if tracker is not None:
+            tracker.check()
+        if on_chunk is not None:
+            await deliver(index, output[0])
+        return output
+
+    tasks = [
+        asyncio.create_task(run_chunk(index, chunk))
+        for index, chunk in enumerate(chunks)
+    ]
+    try:
+        chunk_outputs = await asyncio.gather(*tasks)
+    except BaseException:
+        # Queued chunks of a failed job would only keep workers busy
+        for task in tasks:
+            task.cancel()
+        raise
+    chunk_results = [found for found, _ in chunk_outputs]
+    stats = sum((chunk_stats for _, chunk_stats in chunk_outputs), Counter())
+    logger.info(f"Matching tier hits: {dict(stats)}")
+    return by_source(
+        {
+            name: [
+                company
+                for chunk_result in chunk_results
+                for company in chunk_result[name]
+            ]
+            for name in source_versions
+        }
+    )
+
+
+async def match_in_memory(
+    tracker: MemoryTracker,
+    companies: list[str],
+    source_versions: dict[str, str],
+    streaming: bool,
+    user_id: int,
+    chunk_size: int,
+    on_chunk: Callable[[slice, dict], Awaitable] | None = None,
+) -> tuple[dict[str, list[str]], bool]:
+    """
+    Matches companies against lists compiled in the bot memory.
+    Returns the matches and whether every list was processed.
+    """
+    matched_all = True
+    compiled_versions = {}
+    for name in settings.SANCTIONS_SOURCES:
+        if name not in source_versions:
+            continue
+        logger.info(f"Processing {name} sanctions list")
+        with tracker.stage(f"parse:{name}"), span("parse", source=name):
+            try:
+                await asyncio.to_thread(
+                    get_compiled_source,
+                    name,
+                    source_versions[name],
+                    streaming,
+                )
+                compiled_versions[name] = source_versions[name]
+            except Exception as e:
+                logger.error(f"Failed to process {name}: {e}", exc_info=True)
+                matched_all = False
+    with tracker.stage("match"), span("search_matches", backend="memory"):
+        results = await match_in_chunks(
+            companies,
+            compiled_versions,
+            user_id=user_id,
+            chunk_size=chunk_size,
+            tracker=tracker,
+            on_chunk=on_chunk,
+        )
+    return results, matched_all
+
+
+async def match_with_postgres(
+    tracker: MemoryTracker,
+    companies: list[str],
+    source_versions: dict[str, str],
+    streaming: bool,
+) -> tuple[dict[str, list[str]], bool]:
+    """
+    Matches companies against lists loaded into the trigram-indexed
+    sanction_entry table. Returns the matches and whether every list
+    was processed.
+    """
+    matched_all = True
+    results = {name: None for name in settings.SANCTIONS_SOURCES}
+    async with AsyncSessionLocal() as session:
+        for name, version in source_versions.items():
+            logger.info(f"Processing {name} sanctions list")
+            try:
+                with tracker.stage(f"parse:{name}"), span(
+                    "parse", source=name
+                ):
+                    await load_source(
+                        session,
+                        name,
+                        version,
+                        source_path(name),
+                        settings.SANCTIONS_SOURCES[name]["ext"],
+                        streaming,
+                    )
+                with tracker.stage("match"), span(
+                    "search_matches", backend="postgres", source=name
+                ):
+                    results[name] = await match_source(
+                        session, name, companies, settings.MATCH_THRESHOLD
+                    )
+            except MemoryBudgetExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to process {name}: {e}", exc_info=True)
+                matched_all = False
+    return results, matched_all
+
+
+async def check_sanctions(
+    uploaded_file_path: str,
+    chat_id: int,
+    bot: Bot,
+    report_format: str = "xlsx",
+):
     """
     Downloads companies from an Excel file, checks them for sanctions lists,
-    and sends the final report to the user.
+    and sends the final report to the user in the chosen format.
     """
+    try:
+        with span("check_sanctions", report_format=report_format):
+            await _check_sanctions(
+                uploaded_file_path, chat_id, bot, report_format
+            )
+    except MemoryBudgetExceeded as e:
+        logger.error(f"Sanctions check rejected: {e}")
+        if e.other_jobs:
+            text = (
+                "The bot ran short of memory while other checks were "
+                "running at the same time as yours. "
+                "Please try again in a few minutes."
+            )
+        else:
+            text = (
+                "The file is too large to be checked within the memory "
+                "limit of the bot. Please split it into smaller files."
+            )
+        await bot.send_message(chat_id=chat_id, text=text)
+    except ReportTooLarge as e:
+        logger.error(f"Report not sent: {e}")
+        await bot.send_message(
+            chat_id=chat_id,
+            text=(
+                "The report is too large to be sent through Telegram, even "
+                "compressed. Please split the file into smaller files."
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Sanctions check failed: {e}", exc_info=True)
+        await bot.send_message(
+            chat_id=chat_id,
+            text=(
+                "The check could not be completed because of an internal "
+                "error. Please try again later."
+            ),
+        )
+    finally:
+        remove_upload(uploaded_file_path)
+
+
+async def _check_sanctions(
+    uploaded_file_path: str,
+    chat_id: int,
+    bot: Bot,
+    report_format: str,
+):
+    """Runs the check stages under the job memory budget."""
     date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    output_file = f"{settings.RESULT_DIR}/sanctions_companies_{date_str}.xlsx"
+    report_name = f"sanctions_companies_{date_str}"
+    output_file = f"{settings.RESULT_DIR}/{report_name}.{report_format}"
     logger.info("Starting sanctions check process")
-    original_companies = await asyncio.to_thread(
-        load_companies_from_excel, uploaded_file_path
+    upload_hash = await asyncio.to_thread(file_sha256, uploaded_file_path)
+    source_versions = await download_sources()
+    report_key = build_report_key(
+        upload_hash,
+        source_versions,
+        settings.MATCH_THRESHOLD,
+        report_format,
+        settings.MATCH_BACKEND,
     )
-    logger.info(f"Loaded {len(original_companies)} companies from input file")
-    normalized_companies = await asyncio.to_thread(
-        normalize_company_name, original_companies
+    all_sources_ready = len(source_versions) == len(
+        settings.SANCTIONS_SOURCES
     )
-    os.makedirs(settings.TMP_DIR_SCRAPER, exist_ok=True)
-    os.makedirs(settings.RESULT_DIR, exist_ok=True)
-    results = {}
-    for name, source in settings.SANCTIONS_SOURCES.items():
-        url = source["url"]
-        ext = source["ext"]
-        file_path = Path(f"{settings.TMP_DIR_SCRAPER}/{name}{ext}")
-        logger.info(f"Processing {name} sanctions list from {url}")
-        try:
-            await asyncio.to_thread(download_file, url, file_path)
-            matches = await asyncio.to_thread(
-                search_matches,
-                file=file_path,
-                companies=normalized_companies,
-                source_name=name,
-                ext=ext,
+    cached_report = (
+        get_cached_report(report_key) if all_sources_ready else None
+    )
+    if cached_report:
+        with span("send_document", cached=True):
+            await bot.send_document(
+                chat_id=chat_id,
+                caption="Sanctions check completed",
+                document=FSInputFile(
+                    path=cached_report,
+                    filename=(
+                        report_name + cached_report.name[len(report_key) :]
+                    ),
+                ),
             )
-            results[name] = matches
-            logger.info(f"Processed {name}.Found {len(matches)} matches")
-        except Exception as e:
-            logger.error(f"Failed to process {name}: {e}", exc_info=True)
-            results[name] = []
-    logger.info("Generating final report...")
-    await asyncio.to_thread(
-        save_results_to_excel,
-        results=results,
-        original_companies=original_companies,
-        normalized_companies=normalized_companies,
-        output_file=output_file,
+        logger.info("Cached report sent to user")
+        return
+    budget = settings.JOB_MEMORY_BUDGET_MB << 20
+    full_estimate, streaming_estimate = estimate_job_memory(
+        uploaded_file_path,
+        [source_path(name) for name in source_versions],
     )
+    if budget and streaming_estimate > budget:
+        raise MemoryBudgetExceeded(
+            f"Estimated {streaming_estimate >> 20} MB exceeds the budget "
+            f"of {settings.JOB_MEMORY_BUDGET_MB} MB"
+        )
+    streaming = bool(budget) and full_estimate > budget
+    chunk_size = settings.MATCH_CHUNK_SIZE
+    if streaming:
+        logger.info(
+            f"Estimated {full_estimate >> 20} MB exceeds the budget, "
+            "switching to streaming parsing and smaller chunks"
+        )
+        chunk_size = max(chunk_size // 4, 1)
+    with MemoryTracker(budget) as tracker:
+        with tracker.stage("load"), span("load_companies"):
+            original_companies = await asyncio.to_thread(
+                load_companies_from_excel, uploaded_file_path
+            )
+            logger.info(
+                f"Loaded {len(original_companies)} companies from input file"
+            )
+            normalized_companies = await asyncio.to_thread(
+                normalize_company_name, original_companies
+            )
+        os.makedirs(settings.RESULT_DIR, exist_ok=True)
+        report = await asyncio.to_thread(
+            open_report,
+            output_file,
+            report_format,
+            list(settings.SANCTIONS_SOURCES),
+            len(original_companies),
+        )
+
+        async def write_rows(rows: slice, chunk_results: dict):
+            await asyncio.to_thread(
+                report.write,
+                iter_result_rows(
+                    chunk_results,
+                    original_companies[rows],
+                    normalized_companies[rows],
+                ),
+            )
+
+        try:
+            if settings.MATCH_BACKEND == "postgres":
+                # Lists are matched one at a time, rows are complete only
+                # once every list is done
+                results, matched_all = await match_with_postgres(
+                    tracker, normalized_companies, source_versions, streaming
+                )
+                with tracker.stage("report"):
+                    await write_rows(slice(None), results)
+            else:
+                # Rows are written as soon as their chunk is matched
+                results, matched_all = await match_in_memory(
+                    tracker,
+                    normalized_companies,
+                    source_versions,
+                    streaming,
+                    user_id=chat_id,
+                    chunk_size=chunk_size,
+                    on_chunk=write_rows,
+                )
+        except BaseException:
+            await asyncio.to_thread(report.abort)
+            raise
+        all_sources_ready = all_sources_ready and matched_all
+        for name, matches in results.items():
+            if matches is None:
+                logger.warning(f"{name} could not be checked")
+            else:
+                logger.info(f"Processed {name}.Found {len(matches)} matches")
+        logger.info("Finishing final report...")
+        with tracker.stage("report"), span(
+            "save_results", report_format=report_format
+        ):
+            output_file = await asyncio.to_thread(report.close)
+    if all_sources_ready:
+        await asyncio.to_thread(store_report, report_key, output_file)
     ready_file = FSInputFile(path=output_file)
-    await bot.send_document(
-        chat_id=chat_id,
-        caption="Sanctions check completed",
-        document=ready_file,
-    )
+    caption = "Sanctions check completed"
+    unavailable = [
+        name for name, matches in results.items() if matches is None
+    ]
+    if unavailable:
+        caption += f"\nNot checked, lists unavailable: {unavailable}"
+    with span("send_document", cached=False):
+        await bot.send_document(
+            chat_id=chat_id,
+            caption=caption,
+            document=ready_file,
+        )
     logger.info("Results successfully sent to user")
-    clean_tmp_folders(folders=[settings.TMP_DIR_BOT, settings.TMP_DIR_SCRAPER])
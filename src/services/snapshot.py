@@ -0,0 +1,181 @@
+"""
+Snapshot bundles of sanctions lists.
+
+A bundle is a .tar.gz archive with the downloaded source files, their
+compiled candidate data and a manifest with the version of every list.
+Compiled keys are only reused when they were built by the current
+match key rules, otherwise they are rebuilt from the names:
+
+    manifest.json
+    sources/<name><ext>
+    compiled/<name>.json
+
+Usage:
+    python -m src.services.snapshot export <path>
+    python -m src.services.snapshot import <path>
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import asyncio
+import logging
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from src.core.config import settings
+from src.services.sanctions_service import (
+    download_sources,
+    get_compiled_source,
+    set_compiled_source,
+    source_path,
+)
+from src.utils.report_cache import file_sha256
+from src.utils.text_utils import MATCH_KEY_VERSION
+from src.utils.web_scraper import CandidateList, compile_candidates
+
+
+logger = logging.getLogger(name="snapshot")
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+def _dump_compiled(compiled: CandidateList) -> dict:
+    """Converts compiled candidates to JSON-serializable data."""
+    return {
+        "names": compiled.names,
+        "keys": compiled.keys,
+        "cyrillic_keys": compiled.cyrillic_keys,
+        "phonetic_keys": compiled.phonetic_keys,
+        "cyrillic_phonetic_keys": compiled.cyrillic_phonetic_keys,
+    }
+
+
+def _load_compiled(data: dict) -> CandidateList:
+    """Restores compiled candidates stored by _dump_compiled."""
+    return CandidateList(
+        names=data["names"],
+        keys=data["keys"],
+        cyrillic_keys=data["cyrillic_keys"],
+        phonetic_keys=data["phonetic_keys"],
+        cyrillic_phonetic_keys=data["cyrillic_phonetic_keys"],
+    )
+
+
+def _add_bytes(archive: tarfile.TarFile, name: str, data: bytes):
+    """Adds in-memory data to the archive as a file."""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(datetime.now(timezone.utc).timestamp())
+    archive.addfile(info, io.BytesIO(data))
+
+
+def export_snapshot(path: str | Path, versions: dict[str, str]):
+    """
+    Writes the given versions of the downloaded lists, with their
+    compiled candidates, into a bundle at path.
+    """
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "key_version": MATCH_KEY_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "sources": {},
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tarfile.open(tmp_path, "w:gz") as archive:
+        for name, version in versions.items():
+            source = settings.SANCTIONS_SOURCES[name]
+            compiled = get_compiled_source(name, version)
+            archive.add(
+                source_path(name), arcname=f"sources/{name}{source['ext']}"
+            )
+            _add_bytes(
+                archive,
+                f"compiled/{name}.json",
+                json.dumps(_dump_compiled(compiled)).encode("utf-8"),
+            )
+            manifest["sources"][name] = {
+                "url": source["url"],
+                "ext": source["ext"],
+                "sha256": version,
+                "candidates": len(compiled.names),
+            }
+        _add_bytes(
+            archive,
+            "manifest.json",
+            json.dumps(manifest, indent=2).encode("utf-8"),
+        )
+    os.replace(tmp_path, path)
+    logger.info(f"Snapshot with {len(versions)} lists exported to {path}")
+
+
+def import_snapshot(path: str | Path) -> dict[str, str]:
+    """
+    Installs the lists of a bundle as the current downloaded lists and
+    preloads their compiled candidates. Returns the imported versions.
+    """
+    versions = {}
+    os.makedirs(settings.TMP_DIR_SCRAPER, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir, tarfile.open(
+        path, "r:gz"
+    ) as archive:
+        archive.extractall(tmp_dir, filter="data")
+        tmp_dir = Path(tmp_dir)
+        manifest = json.loads((tmp_dir / "manifest.json").read_text())
+        format_version = manifest.get("format_version")
+        if format_version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {format_version}")
+        current_keys = manifest.get("key_version") == MATCH_KEY_VERSION
+        if not current_keys:
+            logger.warning(
+                "Snapshot keys were built by other match key rules, "
+                "they are rebuilt from the names"
+            )
+        for name, meta in manifest["sources"].items():
+            if name not in settings.SANCTIONS_SOURCES:
+                logger.warning(f"Skipping unknown list {name} in snapshot")
+                continue
+            source_file = tmp_dir / "sources" / f"{name}{meta['ext']}"
+            if file_sha256(source_file) != meta["sha256"]:
+                raise ValueError(f"Checksum mismatch for {name} in snapshot")
+            target = source_path(name)
+            tmp_target = target.with_name(f".{target.name}.snapshot")
+            shutil.copyfile(source_file, tmp_target)
+            os.replace(tmp_target, target)
+            compiled_file = tmp_dir / "compiled" / f"{name}.json"
+            data = json.loads(compiled_file.read_text())
+            if current_keys:
+                compiled = _load_compiled(data)
+            else:
+                compiled = compile_candidates(data["names"])
+            set_compiled_source(name, meta["sha256"], compiled)
+            versions[name] = meta["sha256"]
+    logger.info(
+        f"Snapshot from {manifest['created_at']} imported "
+        f"with {len(versions)} lists"
+    )
+    return versions
+
+
+async def _main(command: str, path: str):
+    if command == "export":
+        versions = await download_sources()
+        await asyncio.to_thread(export_snapshot, path, versions)
+    elif command == "import":
+        await asyncio.to_thread(import_snapshot, path)
+    else:
+        raise SystemExit(f"Unknown command: {command}")
+
+
+if __name__ == "__main__":
+    from src.core.logger import setup_logging
+
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__)
+    setup_logging()
+    asyncio.run(_main(sys.argv[1], sys.argv[2]))
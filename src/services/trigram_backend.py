@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from pathlib import Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.config import settings
+from src.db.operations import SanctionEntryDAO
+from src.utils.text_utils import match_key
+from src.utils.web_scraper import (
+    company_match_keys,
+    confirm_shortlists,
+    load_candidates,
+)
+
+
+logger = logging.getLogger(name="trigram_backend")
+
+
+def build_entry_records(names: list[str]) -> list[tuple[str, str, str]]:
+    """Prepares (name, name_lower, match_key) rows for bulk COPY."""
+    return [
+        (name, name.lower(), match_key(name))
+        for name in dict.fromkeys(names)
+        if name.strip()
+    ]
+
+
+async def load_source(
+    session: AsyncSession,
+    name: str,
+    version: str,
+    file: Path,
+    ext: str,
+    streaming: bool = False,
+):
+    """
+    Parses a sanctions list into the database, unless this version
+    of the list is already loaded.
+    """
+    if await SanctionEntryDAO.get_list_version(session, name) == version:
+        logger.info(f"{name} list version is already loaded")
+        return
+    names = await asyncio.to_thread(
+        load_candidates, file, name, ext, streaming
+    )
+    records = await asyncio.to_thread(build_entry_records, names)
+    await SanctionEntryDAO.replace_source(session, name, version, records)
+
+
+async def match_source(
+    session: AsyncSession,
+    name: str,
+    companies: list[str],
+    threshold: int,
+) -> list[str]:
+    """
+    Shortlists candidates with indexed trigram similarity queries and
+    confirms them with token_set_ratio, chunk by chunk.
+    """
+    found = []
+    size = settings.MATCH_CHUNK_SIZE
+    for start in range(0, len(companies), size):
+        chunk = companies[start : start + size]
+        company_keys = await asyncio.to_thread(company_match_keys, chunk)
+        shortlists = await SanctionEntryDAO.shortlist(
+            session,
+            source=name,
+            names=chunk,
+            keys=[keys[0] for keys in company_keys],
+            similarity=settings.PG_TRGM_SIMILARITY,
+        )
+        found.extend(
+            await asyncio.to_thread(
+                confirm_shortlists,
+                chunk,
+                company_keys,
+                shortlists,
+                threshold,
+            )
+        )
+    return found
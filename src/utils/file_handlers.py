@@ -1,42 +1,57 @@
 import os
-import shutil
-import pandas as pd
-import logging.config
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from typing import List
-from src.core.logger import logging_config
+import csv
+import json
+import logging
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List
+from src.core.config import settings
 
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger(name="file_handlers")
 
 
+class ReportTooLarge(Exception):
+    """Raised when even the zipped report exceeds the Telegram upload limit"""
+
+
 def load_companies_from_excel(filepath: str):
     """
     Loads a list of companies from an Excel file.
     The file is expected to have a column named "Company".
     """
+    import pandas as pd
+
     df = pd.read_excel(filepath)
     return df["Company"].dropna().astype(str).tolist()
 
 
-def save_results_to_excel(
+# Excel sheets are limited to 1,048,576 rows including the header
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def iter_result_rows(
     results: dict,
     original_companies: List[str],
     normalized_companies: List[str],
-    output_file: str,
-):
-    """Saves sanctions check results to a color-coded Excel file."""
-    logger.info(
-        f"Saving results for {len(original_companies)} "
-        f"companies to {output_file}"
-    )
-    data = []
+) -> Iterator[dict]:
+    """
+    Yields one report row per company, in upload order.
+    Lists whose results are None could not be checked and are marked N/A.
+    """
+    matched_sets = {
+        key: None if matches is None else set(matches)
+        for key, matches in results.items()
+    }
+    unavailable = [k for k, v in matched_sets.items() if v is None]
     for original, normalized in zip(original_companies, normalized_companies):
         status = {
-            key: "Yes" if normalized in matches else "No"
-            for key, matches in results.items()
+            key: (
+                "N/A"
+                if matches is None
+                else "Yes" if normalized in matches else "No"
+            )
+            for key, matches in matched_sets.items()
         }
         matched_lists = [k for k, v in status.items() if v == "Yes"]
         info = (
@@ -44,38 +59,234 @@ def save_results_to_excel(
             if matched_lists
             else "No sanctions found"
         )
-        data.append({"Company": original, **status, "Sanctions Info": info})
-    df_out = pd.DataFrame(data)
-    df_out.to_excel(output_file, index=False)
-    wb = load_workbook(output_file)
-    ws = wb.active
-    fill_yes = PatternFill(
-        start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"
-    )
-    fill_no = PatternFill(
-        start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"
+        if unavailable:
+            info += f" (not checked: {unavailable})"
+        yield {"Company": original, **status, "Sanctions Info": info}
+
+
+def save_results(
+    results: dict,
+    original_companies: List[str],
+    normalized_companies: List[str],
+    output_file: str,
+    report_format: str = "xlsx",
+) -> str:
+    """
+    Writes the report in the requested format and returns its path,
+    see ReportWriter.
+    """
+    writer = open_report(
+        output_file, report_format, list(results), len(original_companies)
     )
-    for row in ws.iter_rows(min_row=2, min_col=2, max_col=ws.max_column - 1):
-        for cell in row:
-            if cell.value == "Yes":
-                cell.fill = fill_yes
-            elif cell.value == "No":
-                cell.fill = fill_no
-    wb.save(output_file)
-    logger.info(f"Results saved to file: {output_file}")
-
-
-def clean_tmp_folders(folders: list):
-    """Deletes all files and subdirectories within the specified folders."""
-    logger.info("Clean tmp folders")
-    for folder in folders:
-        if os.path.exists(folder):
-            for filename in os.listdir(folder):
-                file_path = os.path.join(folder, filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    logger.warning(f"Could not delete {file_path}: {e}")
+    try:
+        writer.write(
+            iter_result_rows(
+                results, original_companies, normalized_companies
+            )
+        )
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def open_report(
+    output_file: str, report_format: str, list_names: List[str], rows: int
+) -> "ReportWriter":
+    """
+    Starts a report for the given number of rows. Excel falls back to
+    CSV above the sheet row limit.
+    """
+    if report_format == "xlsx" and rows >= EXCEL_MAX_ROWS:
+        logger.warning("Too many rows for Excel, writing CSV instead")
+        report_format = "csv"
+    output_file = str(Path(output_file).with_suffix(f".{report_format}"))
+    logger.info(f"Saving results for {rows} companies to {output_file}")
+    writers = {
+        "xlsx": ExcelReportWriter,
+        "csv": CsvReportWriter,
+        "parquet": ParquetReportWriter,
+        "jsonl": JsonLinesReportWriter,
+    }
+    return writers[report_format](output_file, list_names)
+
+
+class ReportWriter:
+    """
+    Writes report rows to a file as they are produced, e.g. chunk by
+    chunk while matching runs. close() finishes the file, zips reports
+    larger than the Telegram upload limit and returns the path. Raises
+    ReportTooLarge when the archive is still above the limit.
+    """
+
+    def __init__(self, output_file: str, list_names: List[str]):
+        self.output_file = output_file
+        self.list_names = list_names
+        self.columns = ["Company", *list_names, "Sanctions Info"]
+
+    def write(self, rows: Iterable[dict]):
+        """Appends rows made by iter_result_rows."""
+        raise NotImplementedError
+
+    def _finish(self):
+        """Completes and closes the file."""
+        raise NotImplementedError
+
+    def close(self) -> str:
+        self._finish()
+        logger.info(f"Results saved to file: {self.output_file}")
+        output_file = self.output_file
+        limit = settings.TELEGRAM_UPLOAD_LIMIT_MB << 20
+        if os.path.getsize(output_file) > limit:
+            output_file = compress_file(output_file)
+            size = os.path.getsize(output_file)
+            if size > limit:
+                os.remove(output_file)
+                raise ReportTooLarge(
+                    f"Zipped report is {size >> 20} MB, above the upload "
+                    f"limit of {settings.TELEGRAM_UPLOAD_LIMIT_MB} MB"
+                )
+        return output_file
+
+    def abort(self):
+        """Closes and removes an unfinished report."""
+        try:
+            self._finish()
+        except Exception as e:
+            logger.warning(f"Could not close {self.output_file}: {e}")
+        Path(self.output_file).unlink(missing_ok=True)
+
+
+class ExcelReportWriter(ReportWriter):
+    """Color-coded Excel report in an openpyxl write-only workbook"""
+
+    def __init__(self, output_file: str, list_names: List[str]):
+        from openpyxl import Workbook
+        from openpyxl.styles import PatternFill
+
+        super().__init__(output_file, list_names)
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._fills = {
+            "Yes": PatternFill(
+                start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"
+            ),
+            "No": PatternFill(
+                start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"
+            ),
+        }
+        self._sheet.append(self.columns)
+
+    def write(self, rows: Iterable[dict]):
+        from openpyxl.cell import WriteOnlyCell
+
+        for row in rows:
+            cells = []
+            for key, value in row.items():
+                cell = WriteOnlyCell(self._sheet, value=value)
+                if key in self.list_names and value in self._fills:
+                    cell.fill = self._fills[value]
+                cells.append(cell)
+            self._sheet.append(cells)
+
+    def _finish(self):
+        self._workbook.save(self.output_file)
+
+
+class CsvReportWriter(ReportWriter):
+    """Report streamed to a CSV file"""
+
+    def __init__(self, output_file: str, list_names: List[str]):
+        super().__init__(output_file, list_names)
+        self._file = open(output_file, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+        self._writer.writeheader()
+
+    def write(self, rows: Iterable[dict]):
+        self._writer.writerows(rows)
+
+    def _finish(self):
+        self._file.close()
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """Report streamed to a JSON Lines file"""
+
+    def __init__(self, output_file: str, list_names: List[str]):
+        super().__init__(output_file, list_names)
+        self._file = open(output_file, "w", encoding="utf-8")
+
+    def write(self, rows: Iterable[dict]):
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _finish(self):
+        self._file.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    """Report written to a Parquet file in row batches"""
+
+    def __init__(
+        self,
+        output_file: str,
+        list_names: List[str],
+        batch_size: int = 50_000,
+    ):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__(output_file, list_names)
+        self.batch_size = batch_size
+        self._schema = pa.schema(
+            [(column, pa.string()) for column in self.columns]
+        )
+        self._writer = pq.ParquetWriter(output_file, self._schema)
+        self._batch: List[dict] = []
+        self._written = False
+
+    def write(self, rows: Iterable[dict]):
+        for row in rows:
+            self._batch.append(row)
+            if len(self._batch) == self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+
+        self._writer.write_table(
+            pa.Table.from_pylist(self._batch, self._schema)
+        )
+        self._batch = []
+        self._written = True
+
+    def _finish(self):
+        # An empty report still gets a row group with the columns
+        if self._batch or not self._written:
+            self._flush()
+        self._writer.close()
+
+
+def compress_file(filepath: str) -> str:
+    """Packs a file into a zip archive next to it and removes the original."""
+    archive_path = f"{filepath}.zip"
+    with zipfile.ZipFile(
+        archive_path, "w", compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        archive.write(filepath, arcname=os.path.basename(filepath))
+    os.remove(filepath)
+    logger.info(f"Report compressed to {archive_path}")
+    return archive_path
+
+
+def remove_upload(filepath: str):
+    """
+    Deletes a processed upload. Downloaded sanctions lists are kept,
+    since they are replaced atomically and may be read by other jobs.
+    """
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not delete {filepath}: {e}")
@@ -0,0 +1,198 @@
+import os
+import time
+import logging
+import resource
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+logger = logging.getLogger(name="memory")
+
+# Rough ratios of in-memory size to file size, used to predict job memory
+EXCEL_MEMORY_FACTOR = 20
+SOURCE_MEMORY_FACTOR = 8
+STREAMING_MEMORY_FACTOR = 2
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a job does not fit into its memory budget"""
+
+    def __init__(self, message: str, other_jobs: int = 0):
+        super().__init__(message)
+        # Jobs running at the same time, whose memory was counted too
+        self.other_jobs = other_jobs
+
+
+def current_rss(pid: int | str = "self") -> int:
+    """Returns the resident memory of a process in bytes."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if pid != "self":
+            return 0
+        # Peak instead of current RSS, but still usable as an upper bound
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def child_pids(pid: int | None = None) -> list[int]:
+    """Returns ids of the direct children of a process, e.g. pool workers."""
+    pid = os.getpid() if pid is None else pid
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # The process name in parentheses may contain spaces
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+            if int(fields[1]) == pid:
+                children.append(int(stat.parent.name))
+        except (OSError, ValueError, IndexError):
+            continue
+    return children
+
+
+def tree_rss(pid: int | None = None) -> int:
+    """Returns resident memory of a process and its children in bytes."""
+    return current_rss(pid or "self") + sum(
+        current_rss(child) for child in child_pids(pid)
+    )
+
+
+def estimate_job_memory(
+    upload_path: str | Path,
+    source_files: list[Path],
+) -> tuple[int, int]:
+    """
+    Predicts job memory from file sizes, both for in-memory parsing and
+    for streaming parsing of the sanctions lists.
+    """
+    upload = os.path.getsize(upload_path) * EXCEL_MEMORY_FACTOR
+    sources = sum(
+        os.path.getsize(path) for path in source_files if path.exists()
+    )
+    return (
+        upload + sources * SOURCE_MEMORY_FACTOR,
+        upload + sources * STREAMING_MEMORY_FACTOR,
+    )
+
+
+class MemoryTracker:
+    """
+    Samples RSS of the bot and its matching processes in a background
+    thread and keeps the peak growth over the job's starting RSS for every
+    stage of the job.
+    The RSS is shared by all jobs, so memory of jobs running at the same
+    time is counted too; their number is logged and passed on with
+    MemoryBudgetExceeded. The budget is enforced when a stage starts and
+    wherever check() is called, e.g. between matching chunks, so a stage
+    that has already finished is never thrown away.
+    """
+
+    _active_jobs = 0
+    _active_lock = threading.Lock()
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        interval: float = 0.05,
+        children_interval: float = 1.0,
+    ):
+        self.budget_bytes = budget_bytes
+        self.interval = interval
+        self.children_interval = children_interval
+        self.peaks: dict[str, int] = {}
+        self.exceeded = False
+        self.max_other_jobs = 0
+        self._exceeded_by: tuple[str, int, int] | None = None
+        self._children = child_pids()
+        self._children_checked = time.monotonic()
+        self._baseline = self._rss()
+        self._stage: str | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self):
+        with MemoryTracker._active_lock:
+            MemoryTracker._active_jobs += 1
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        with MemoryTracker._active_lock:
+            MemoryTracker._active_jobs -= 1
+        others = (
+            f" (up to {self.max_other_jobs} other job(s) running)"
+            if self.max_other_jobs
+            else ""
+        )
+        logger.info(f"Peak memory per stage: {self.summary()}{others}")
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Attributes memory sampled inside the block to a stage, which is
+        only started while the job is within its budget.
+        """
+        self.check()
+        self._stage = name
+        self._record()
+        try:
+            yield
+        finally:
+            self._record()
+            self._stage = None
+
+    def check(self):
+        """Raises MemoryBudgetExceeded once the budget has been exceeded."""
+        if self._exceeded_by is None:
+            return
+        stage, used, other_jobs = self._exceeded_by
+        message = (
+            f"Memory grew by {used >> 20} MB in stage {stage}, over the "
+            f"budget of {self.budget_bytes >> 20} MB"
+        )
+        if other_jobs:
+            message += (
+                f", with {other_jobs} other job(s) running whose memory "
+                "was counted too"
+            )
+        raise MemoryBudgetExceeded(message, other_jobs=other_jobs)
+
+    def summary(self) -> str:
+        """Formats stage peaks in megabytes for logs."""
+        return ", ".join(
+            f"{name}={peak / 2**20:.1f}MB" for name, peak in self.peaks.items()
+        )
+
+    def _rss(self) -> int:
+        """Returns RSS of the bot and its matching processes."""
+        now = time.monotonic()
+        # Pool workers rarely change, and listing processes is not free
+        if now - self._children_checked > self.children_interval:
+            self._children = child_pids()
+            self._children_checked = now
+        return current_rss() + sum(
+            current_rss(child) for child in self._children
+        )
+
+    def _record(self):
+        """Stores the current RSS growth for the active stage."""
+        stage = self._stage
+        if stage is None:
+            return
+        other_jobs = MemoryTracker._active_jobs - 1
+        self.max_other_jobs = max(self.max_other_jobs, other_jobs)
+        used = max(self._rss() - self._baseline, 0)
+        self.peaks[stage] = max(self.peaks.get(stage, 0), used)
+        if self.budget_bytes and used > self.budget_bytes:
+            if not self.exceeded:
+                self._exceeded_by = (stage, used, other_jobs)
+            self.exceeded = True
+
+    def _sample(self):
+        """Background loop recording RSS until the job finishes."""
+        while not self._stop.wait(self.interval):
+            self._record()
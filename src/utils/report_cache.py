@@ -0,0 +1,107 @@
+import os
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from src.core.config import settings
+from src.utils.web_scraper import MATCHING_VERSION
+
+
+logger = logging.getLogger(name="report_cache")
+
+
+def file_sha256(filepath: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """Calculates the SHA-256 hash of a file without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_report_key(
+    upload_hash: str,
+    source_versions: dict[str, str],
+    threshold: int,
+    report_format: str,
+    backend: str,
+) -> str:
+    """
+    Builds a cache key from the uploaded file content, the versions
+    of all sanctions lists, the matching threshold, the report format,
+    the matching backend and the version of the matching code.
+    """
+    digest = hashlib.sha256()
+    digest.update(upload_hash.encode())
+    for name in sorted(source_versions):
+        digest.update(f"|{name}={source_versions[name]}".encode())
+    digest.update(f"|threshold={threshold}".encode())
+    digest.update(f"|format={report_format}".encode())
+    digest.update(f"|backend={backend}".encode())
+    digest.update(f"|matching={MATCHING_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def get_cached_report(key: str) -> Path | None:
+    """Returns the path of a previously generated report, if any."""
+    cache_dir = Path(settings.REPORT_CACHE_DIR)
+    if not cache_dir.exists():
+        return None
+    path = next(
+        (p for p in cache_dir.glob(f"{key}.*") if p.suffix != ".tmp"), None
+    )
+    if path is None:
+        return None
+    if _is_expired(path):
+        path.unlink(missing_ok=True)
+        return None
+    # Refresh mtime so that eviction drops the least recently used reports
+    os.utime(path)
+    logger.info(f"Report cache hit: {key}")
+    return path
+
+
+def store_report(key: str, report_path: str | Path):
+    """Copies a generated report into the cache and evicts stale entries."""
+    cache_dir = Path(settings.REPORT_CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Keep every suffix so that compressed reports stay e.g. ".csv.zip"
+    target = cache_dir / f"{key}{''.join(Path(report_path).suffixes)}"
+    tmp_target = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    shutil.copyfile(report_path, tmp_target)
+    os.replace(tmp_target, target)
+    logger.info(f"Report stored in cache: {key}")
+    evict_reports()
+
+
+def evict_reports():
+    """
+    Removes expired reports and then the least recently used ones
+    while the cache holds more than REPORT_CACHE_MAX_FILES reports.
+    """
+    cache_dir = Path(settings.REPORT_CACHE_DIR)
+    if not cache_dir.exists():
+        return
+    reports = []
+    for path in cache_dir.iterdir():
+        if not path.is_file() or path.suffix == ".tmp":
+            continue
+        try:
+            if _is_expired(path):
+                path.unlink()
+            else:
+                reports.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    reports.sort()
+    excess = len(reports) - settings.REPORT_CACHE_MAX_FILES
+    for _, path in reports[: max(excess, 0)]:
+        path.unlink(missing_ok=True)
+        logger.info(f"Evicted cached report: {path.name}")
+
+
+def _is_expired(path: Path) -> bool:
+    """Checks whether a cached report is older than the configured TTL."""
+    ttl = settings.REPORT_CACHE_TTL_HOURS * 3600
+    return time.time() - path.stat().st_mtime > ttl
@@ -1,8 +1,44 @@
 import re
-from rapidfuzz.fuzz import token_set_ratio
+from bisect import bisect_left, bisect_right
+from collections import Counter
 from typing import List
 
 
+# fmt: off
+# BGN/PCGN-style romanization (х -> kh, ц -> ts, щ -> shch), lowercase
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e",
+    "ё": "e", "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k",
+    "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "",
+    "э": "e", "ю": "yu", "я": "ya", "і": "i", "ї": "yi", "є": "ye",
+    "ґ": "g", "ў": "u",
+}
+
+# Legal forms that differ between scripts and are dropped from match keys
+LEGAL_FORMS = {
+    "ooo", "oao", "zao", "pao", "ao", "ip", "tov", "pat", "llc", "ltd",
+    "limited", "inc", "jsc", "ojsc", "cjsc", "pjsc", "corp", "co", "gmbh",
+    "plc", "sa", "ag",
+}
+
+# Spellings that sound alike, longest first
+PHONETIC_REPLACEMENTS = (
+    ("shch", "s"), ("sch", "s"), ("sh", "s"), ("zh", "z"), ("kh", "h"),
+    ("ch", "c"), ("ts", "c"), ("tz", "c"), ("ph", "f"), ("ck", "k"),
+    ("ks", "x"), ("q", "k"), ("w", "v"), ("j", "y"),
+)
+# fmt: on
+
+# Version of the match_key and phonetic_key rules, stored with keys built
+# ahead of time, e.g. in snapshot bundles: bump it when they change
+MATCH_KEY_VERSION = 1
+
+_CYRILLIC_RE = re.compile(r"[Ѐ-ӿ]")
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+
 def normalize_company_name(companies: List[str]):
     """
     Normalizes a list of company names by removing parentheses
@@ -18,4 +54,129 @@ def normalize_company_name(companies: List[str]):
 
 def is_similar(a: str, b: str, threshold: int = 85):
     """Checks whether strings are similar enough given a given threshold."""
+    from rapidfuzz.fuzz import token_set_ratio
+
     return token_set_ratio(a.lower(), b.lower()) >= threshold
+
+
+def has_cyrillic(name: str) -> bool:
+    """Checks whether a name contains Cyrillic letters."""
+    return _CYRILLIC_RE.search(name) is not None
+
+
+def transliterate(name: str) -> str:
+    """Converts Cyrillic letters of a lowercased name to Latin."""
+    return "".join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in name.lower())
+
+
+def match_key(name: str) -> str:
+    """
+    Builds a script-independent key: transliterated, lowercased,
+    without punctuation and legal forms such as "ООО" or "LLC".
+    """
+    tokens = _NON_WORD_RE.sub(" ", transliterate(name)).split()
+    return " ".join(token for token in tokens if token not in LEGAL_FORMS)
+
+
+def phonetic_key(key: str) -> str:
+    """
+    Reduces a match key to a consonant skeleton, so that spellings like
+    "romashka" and "romaschka" get the same key.
+    """
+    result = []
+    for token in key.split():
+        for old, new in PHONETIC_REPLACEMENTS:
+            token = token.replace(old, new)
+        skeleton = token[0] + "".join(
+            ch for ch in token[1:] if ch not in "aeiouy"
+        )
+        result.append(re.sub(r"(.)\1+", r"\1", skeleton))
+    return " ".join(result)
+
+
+def token_key(name: str) -> str:
+    """
+    Joins the unique lowercased tokens of a name in sorted order.
+    Names with equal keys have a token_set_ratio of 100.
+    """
+    return " ".join(sorted(set(name.lower().split())))
+
+
+class SimilarityIndex:
+    """
+    Answers "is any candidate similar to this name" with the same result
+    as calling is_similar for every candidate, through a tiered cascade:
+
+    1. exact: the name has the same token key as a candidate;
+    2. token: candidates sharing a token are scored with token_set_ratio;
+    3. length: candidates without shared tokens score at most
+       100 - 100 * |la - lb| / (la + lb), where la and lb are lengths of
+       the token keys, so only those within a length window are scored;
+       the rest are pruned without scoring.
+    """
+
+    # Keeps float rounding from pruning a candidate right at the threshold
+    BOUND_MARGIN = 0.01
+
+    def __init__(self, names: List[str]):
+        self.names = [name.lower() for name in names]
+        keys = [token_key(name) for name in self.names]
+        self.exact = {key for key in keys if key}
+        self.postings: dict[str, List[int]] = {}
+        for idx, key in enumerate(keys):
+            for token in key.split():
+                self.postings.setdefault(token, []).append(idx)
+        by_length = sorted(
+            (len(key), idx) for idx, key in enumerate(keys) if key
+        )
+        self.lengths = [length for length, _ in by_length]
+        self.names_by_length = [self.names[idx] for _, idx in by_length]
+
+    def contains_similar(
+        self, name: str, threshold: int, stats: Counter | None = None
+    ) -> bool:
+        """Checks whether any candidate is similar to the name."""
+        from rapidfuzz.fuzz import token_set_ratio
+        from rapidfuzz.process import extractOne
+
+        if stats is None:
+            stats = Counter()
+        if threshold <= 0:
+            return bool(self.names)
+        if threshold > 100:
+            return False
+        name = name.lower()
+        key = token_key(name)
+        if not key:
+            stats["miss"] += 1
+            return False
+        if key in self.exact:
+            stats["exact"] += 1
+            return True
+        shared = set()
+        for token in key.split():
+            shared.update(self.postings.get(token, ()))
+        if shared and extractOne(
+            name,
+            [self.names[idx] for idx in shared],
+            scorer=token_set_ratio,
+            score_cutoff=threshold,
+        ):
+            stats["token"] += 1
+            return True
+        # |la - lb| / (la + lb) <= ratio keeps the bound above threshold
+        ratio = (100 - threshold + self.BOUND_MARGIN) / 100
+        length = len(key)
+        low = bisect_left(self.lengths, length * (1 - ratio) / (1 + ratio))
+        high = bisect_right(self.lengths, length * (1 + ratio) / (1 - ratio))
+        stats["pruned"] += len(self.lengths) - (high - low)
+        if high > low and extractOne(
+            name,
+            self.names_by_length[low:high],
+            scorer=token_set_ratio,
+            score_cutoff=threshold,
+        ):
+            stats["length"] += 1
+            return True
+        stats["miss"] += 1
+        return False
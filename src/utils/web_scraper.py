@@ -1,53 +1,470 @@
-import requests
-import pandas as pd
+import os
+import time
+import pickle
+import hashlib
+import tempfile
 import xml.etree.ElementTree as ET
-import logging.config
-from bs4 import BeautifulSoup
+import logging
+import multiprocessing
+from collections import Counter
+from html.parser import HTMLParser
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
-from src.utils.text_utils import is_similar, normalize_company_name
-from src.core.logger import logging_config
+from src.core.config import settings
+from src.utils.text_utils import (
+    SimilarityIndex,
+    has_cyrillic,
+    is_similar,
+    match_key,
+    phonetic_key,
+)
 
 
-logging.config.dictConfig(logging_config)
 logger = logging.getLogger(name="web_sсraper")
 
+# Shorter consonant skeletons shortlist too many unrelated keys
+MIN_PHONETIC_KEY_LENGTH = 4
+
+# Part of report cache keys: bump it with any change of the matching
+# code or keys that can alter which companies match
+MATCHING_VERSION = 1
+
+_match_executor: ProcessPoolExecutor | None = None
+
+# Compiled lists of this process: source name -> (version, candidates).
+# Matching processes fill it from files the bot writes once per version.
+_compiled_sources: dict[str, tuple[str, "CandidateList"]] = {}
+
+
+def uses_match_processes() -> bool:
+    """Checks whether matching runs in a process pool."""
+    return settings.MATCH_USE_PROCESSES and settings.MATCH_WORKERS > 1
+
+
+def get_match_executor() -> Executor | None:
+    """
+    Returns the shared process pool for matching, or None when matching
+    should run in the calling thread.
+    """
+    global _match_executor
+    if not uses_match_processes():
+        return None
+    if _match_executor is None:
+        from src.core.logger import setup_logging
+
+        # spawn avoids forking a process that already runs threads
+        _match_executor = ProcessPoolExecutor(
+            max_workers=settings.MATCH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_logging,
+            initargs=(True,),
+        )
+        logger.info(
+            f"Started matching pool with {settings.MATCH_WORKERS} processes"
+        )
+    return _match_executor
+
+
+def warm_up_match_executor():
+    """
+    Starts the matching processes ahead of the first job, so that their
+    startup memory is not charged to that job's budget.
+    """
+    executor = get_match_executor()
+    if executor is None:
+        return
+    futures = [
+        executor.submit(os.getpid) for _ in range(settings.MATCH_WORKERS)
+    ]
+    pids = {future.result() for future in futures}
+    logger.info(f"Matching pool warmed up with {len(pids)} processes")
+
+
+def discard_match_executor(executor: Executor):
+    """
+    Drops a pool broken by a killed worker, e.g. after an OOM kill,
+    so that the next chunk starts a new pool instead of failing too.
+    """
+    global _match_executor
+    if executor is not None and executor is _match_executor:
+        _match_executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Matching pool is broken, a new one will be started")
+
+
+def shutdown_match_executor():
+    """Stops the matching process pool if it was started."""
+    global _match_executor
+    if _match_executor is not None:
+        _match_executor.shutdown(cancel_futures=True)
+        _match_executor = None
+
+
+class DownloadError(Exception):
+    """Raised when a sanctions list could not be fully downloaded"""
+
+
+def download_file(url: str, filename: Path) -> str:
+    """
+    Streams a file from a given URL to disk and returns its SHA-256 hash.
+    Data goes to a temporary file that is resumed with HTTP Range requests
+    between retries and renamed into place only once fully received.
+    Resumes are conditional on the ETag or Last-Modified of the partial
+    data, so a list updated between attempts is downloaded from scratch.
+    """
+    import requests
 
-def download_file(url: str, filename: Path):
-    """Downloads a file from a given URL and saves it to disk."""
     logger.info(f"Downloading: {url}")
-    response = requests.get(url, stream=True)
-    if response.status_code == 200:
-        filename.write_bytes(response.content)
-        logger.info(f"Saved: {filename}")
-    else:
-        logger.error(f"Error downloading {url}: {response.status_code}")
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=filename.parent, prefix=f".{filename.name}.", suffix=".part"
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    resume = {}
+    try:
+        for attempt in range(1, settings.DOWNLOAD_RETRIES + 1):
+            try:
+                digest = _download_to(url, tmp_path, resume)
+                break
+            except (requests.RequestException, DownloadError) as e:
+                if attempt == settings.DOWNLOAD_RETRIES or _is_permanent(e):
+                    raise DownloadError(
+                        f"Error downloading {url} after {attempt} "
+                        f"attempts: {e}"
+                    ) from e
+                delay = settings.DOWNLOAD_BACKOFF * 2 ** (attempt - 1)
+                logger.warning(
+                    f"Attempt {attempt} to download {url} failed: {e}. "
+                    f"Retrying in {delay:.0f}s"
+                )
+                time.sleep(delay)
+        os.replace(tmp_path, filename)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    logger.info(f"Saved: {filename}")
+    return digest
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Checks whether an HTTP error will not go away on retry."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return False
+    status = response.status_code
+    return 400 <= status < 500 and status not in (408, 429)
+
 
+def _resume_validator(response) -> str | None:
+    """Returns the ETag or Last-Modified value usable in If-Range."""
+    etag = response.headers.get("ETag")
+    # Weak ETags are not allowed in If-Range
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
 
-def search_matches(
+
+def _download_to(url: str, tmp_path: Path, resume: dict) -> str:
+    """
+    Downloads the file into tmp_path, continuing from the bytes already
+    there when the server supports ranges, and returns the content hash.
+    resume keeps the validator of the partial data between attempts;
+    without one the download starts over.
+    """
+    import requests
+
+    validator = resume.get("validator")
+    offset = tmp_path.stat().st_size if validator else 0
+    # Identity encoding keeps byte offsets valid for Range requests
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    with requests.get(
+        url,
+        headers=headers,
+        stream=True,
+        timeout=(
+            settings.DOWNLOAD_CONNECT_TIMEOUT,
+            settings.DOWNLOAD_READ_TIMEOUT,
+        ),
+    ) as response:
+        if response.status_code == 416:
+            tmp_path.write_bytes(b"")
+            raise DownloadError("Server rejected the resume range")
+        response.raise_for_status()
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code != 206 or not content_range.startswith(
+            f"bytes {offset}-"
+        ):
+            offset = 0
+            resume["validator"] = _resume_validator(response)
+        digest = hashlib.sha256()
+        if offset:
+            logger.info(f"Resuming download of {url} from byte {offset}")
+            with open(tmp_path, "rb") as f:
+                for chunk in iter(
+                    lambda: f.read(settings.DOWNLOAD_CHUNK_SIZE), b""
+                ):
+                    digest.update(chunk)
+        expected = response.headers.get("Content-Length")
+        received = 0
+        with open(tmp_path, "ab" if offset else "wb") as f:
+            for chunk in response.iter_content(
+                chunk_size=settings.DOWNLOAD_CHUNK_SIZE
+            ):
+                f.write(chunk)
+                digest.update(chunk)
+                received += len(chunk)
+    if expected is not None and received < int(expected):
+        raise DownloadError(
+            f"Connection closed after {received} of {expected} bytes"
+        )
+    return digest.hexdigest()
+
+
+def load_candidates(
     file: Path,
-    companies: List[str],
     source_name: str,
     ext: str,
-):
-    """Determines the file type and calls the appropriate match function."""
+    streaming: bool = False,
+) -> List[str]:
+    """
+    Determines the file type and extracts candidate names from it.
+    With streaming=True the file is parsed incrementally instead of
+    being loaded into memory as a whole.
+    """
     if ext == ".csv":
-        return _search_csv(file, companies, source_name)
+        if streaming:
+            return _stream_csv(file, source_name)
+        return _load_csv(file, source_name)
     elif ext == ".xml":
-        return _search_xml(file, companies, source_name)
+        if streaming:
+            return _stream_xml(file, source_name)
+        return _load_xml(file, source_name)
     elif ext == ".html":
-        return _search_html(file, companies, source_name)
+        if streaming:
+            return _stream_html(file, source_name)
+        return _load_html(file, source_name)
     else:
         logger.info("This format is not supported")
         return []
 
 
-def _search_csv(
-    file: Path,
+@dataclass
+class CandidateList:
+    """
+    Candidate names of one sanctions list with match keys built once per
+    list version. Keys of Cyrillic candidates are kept apart, since Latin
+    uploads only need to be compared with those. Phonetic keys map to the
+    match keys that share them.
+    """
+
+    names: List[str]
+    keys: List[str] = field(default_factory=list)
+    cyrillic_keys: List[str] = field(default_factory=list)
+    phonetic_keys: dict[str, List[str]] = field(default_factory=dict)
+    cyrillic_phonetic_keys: dict[str, List[str]] = field(
+        default_factory=dict
+    )
+    name_index: SimilarityIndex = field(init=False, repr=False)
+    key_index: SimilarityIndex = field(init=False, repr=False)
+    cyrillic_key_index: SimilarityIndex = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.name_index = SimilarityIndex(self.names)
+        self.key_index = SimilarityIndex(self.keys)
+        self.cyrillic_key_index = SimilarityIndex(self.cyrillic_keys)
+
+
+def compile_candidates(names: List[str]) -> CandidateList:
+    """Precomputes transliterated and phonetic keys of candidate names."""
+    keys, cyrillic_keys = [], []
+    phonetic_keys, cyrillic_phonetic_keys = {}, {}
+    for name in names:
+        key = match_key(name)
+        if not key:
+            continue
+        phonetic = phonetic_key(key)
+        keys.append(key)
+        phonetic_keys.setdefault(phonetic, []).append(key)
+        if has_cyrillic(name):
+            cyrillic_keys.append(key)
+            cyrillic_phonetic_keys.setdefault(phonetic, []).append(key)
+    return CandidateList(
+        names=names,
+        keys=keys,
+        cyrillic_keys=cyrillic_keys,
+        phonetic_keys=phonetic_keys,
+        cyrillic_phonetic_keys=cyrillic_phonetic_keys,
+    )
+
+
+def company_match_keys(companies: List[str]) -> List[tuple[str, str, bool]]:
+    """Transliterates uploaded names once for all sanctions lists."""
+    keys = []
+    for company in companies:
+        key = match_key(company)
+        keys.append((key, phonetic_key(key), has_cyrillic(company)))
+    return keys
+
+
+def match_companies(
     companies: List[str],
-    source_name: str,
-):
-    """Searches for company matches in a sanctions list CSV file."""
+    candidates: CandidateList,
+    threshold: int,
+    company_keys: List[tuple[str, str, bool]] | None = None,
+    stats: Counter | None = None,
+) -> List[str]:
+    """
+    Returns the companies that are similar to at least one candidate.
+    Names in different scripts are also compared by their match keys:
+    keys with the same phonetic key are scored first, then the rest.
+    A phonetic key alone is never a match, as different names like
+    "mega stroy" and "maga star" share one.
+    Hits per matching tier are added to stats when it is given.
+    """
+    if company_keys is None:
+        company_keys = company_match_keys(companies)
+    if stats is None:
+        stats = Counter()
+    found = []
+    for c, (key, phonetic, cyrillic) in zip(companies, company_keys):
+        if candidates.name_index.contains_similar(c, threshold, stats):
+            found.append(c)
+            continue
+        if not key:
+            continue
+        if cyrillic:
+            index = candidates.key_index
+            phonetic_keys = candidates.phonetic_keys
+        else:
+            index = candidates.cyrillic_key_index
+            phonetic_keys = candidates.cyrillic_phonetic_keys
+        shortlist = (
+            phonetic_keys.get(phonetic, ())
+            if len(phonetic) >= MIN_PHONETIC_KEY_LENGTH
+            else ()
+        )
+        if any(is_similar(key, other, threshold) for other in shortlist):
+            stats["phonetic"] += 1
+            found.append(c)
+        elif index.contains_similar(key, threshold, stats):
+            found.append(c)
+    return found
+
+
+def compiled_path(name: str, version: str) -> Path:
+    """Returns where compiled candidates of a list version are stored."""
+    return Path(settings.TMP_DIR_SCRAPER) / "compiled" / f"{name}.{version}"
+
+
+def get_cached_candidates(name: str, version: str) -> CandidateList | None:
+    """Returns candidates of a list version compiled in this process."""
+    cached = _compiled_sources.get(name)
+    if cached and cached[0] == version:
+        return cached[1]
+    return None
+
+
+def cache_candidates(name: str, version: str, compiled: CandidateList):
+    """
+    Keeps compiled candidates of a list version in this process. With a
+    process pool they are also written to disk, so every matching process
+    loads them once per version instead of receiving them with each chunk.
+    The file is rewritten only for new candidates or when it is missing.
+    """
+    cached = _compiled_sources.get(name)
+    is_new = cached is None or cached[1] is not compiled
+    _compiled_sources[name] = (version, compiled)
+    if uses_match_processes() and (
+        is_new or not compiled_path(name, version).exists()
+    ):
+        _store_compiled(name, version, compiled)
+
+
+def _store_compiled(name: str, version: str, compiled: CandidateList):
+    """Pickles compiled candidates and drops older versions of the list."""
+    path = compiled_path(name, version)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    # The previous version is kept for chunks of jobs still running
+    versions = sorted(
+        path.parent.glob(f"{name}.*"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for stale in versions[2:]:
+        stale.unlink(missing_ok=True)
+
+
+def load_version_candidates(name: str, version: str) -> CandidateList:
+    """
+    Returns candidates of a list version, loading them from the file
+    written by the bot when this process has not seen that version yet.
+    """
+    compiled = get_cached_candidates(name, version)
+    if compiled is None:
+        with open(compiled_path(name, version), "rb") as f:
+            compiled = pickle.load(f)
+        _compiled_sources[name] = (version, compiled)
+        logger.info(f"Loaded {name} list version {version[:12]}")
+    return compiled
+
+
+def match_chunk(
+    companies: List[str],
+    source_versions: dict[str, str],
+    threshold: int,
+) -> tuple[dict[str, List[str]], Counter]:
+    """
+    Matches a chunk of companies against the given versions of sanctions
+    lists. Also returns hits per matching tier, as workers cannot share
+    a counter.
+    """
+    candidates_by_source = {
+        name: load_version_candidates(name, version)
+        for name, version in source_versions.items()
+    }
+    company_keys = company_match_keys(companies)
+    stats = Counter()
+    found = {
+        name: match_companies(
+            companies, candidates, threshold, company_keys, stats
+        )
+        for name, candidates in candidates_by_source.items()
+    }
+    return found, stats
+
+
+def confirm_shortlists(
+    companies: List[str],
+    company_keys: List[tuple[str, str, bool]],
+    shortlists: List[List[str]],
+    threshold: int,
+) -> List[str]:
+    """
+    Confirms companies against their own shortlisted candidates with the
+    same rules as a full scan.
+    """
+    found = []
+    for company, keys, shortlist in zip(companies, company_keys, shortlists):
+        if shortlist and match_companies(
+            [company], compile_candidates(shortlist), threshold, [keys]
+        ):
+            found.append(company)
+    return found
+
+
+def _load_csv(file: Path, source_name: str) -> List[str]:
+    """Extracts candidate names from a sanctions list CSV file."""
+    import pandas as pd
+
     try:
         df = pd.read_csv(
             file,
@@ -63,24 +480,12 @@ def _search_csv(
             header=None,
         )
     if source_name == "OFAC":
-        candidates = df[1].astype(str).tolist()
-    else:
-        candidates = df.astype(str).agg(" ".join, axis=1).tolist()
-
-    normalize_companies = normalize_company_name(companies)
-    found = []
-    for c in normalize_companies:
-        if any(is_similar(c, candidate) for candidate in candidates):
-            found.append(c)
-    return found
+        return df[1].astype(str).tolist()
+    return df.astype(str).agg(" ".join, axis=1).tolist()
 
 
-def _search_xml(
-    file: Path,
-    companies: List[str],
-    source_name: str,
-):
-    """Searches for company matches in a sanctions list XML file."""
+def _load_xml(file: Path, source_name: str) -> List[str]:
+    """Extracts candidate names from a sanctions list XML file."""
     root = ET.parse(file).getroot()
     if source_name == "UK":
         candidates = []
@@ -107,29 +512,265 @@ def _search_xml(
         candidates = [
             line.strip() for line in text.splitlines() if line.strip()
         ]
-    normalize_companies = normalize_company_name(companies)
-    found = []
-    for c in normalize_companies:
-        if any(is_similar(c, candidate) for candidate in candidates):
-            found.append(c)
-    return found
+    return candidates
 
 
-def _search_html(
-    file: Path,
-    companies: List[str],
-    source_name: str,
-):
-    """Searches for company matches in a sanctions list HTML file."""
+def _load_html(file: Path, source_name: str) -> List[str]:
+    """Extracts candidate names from a sanctions list HTML file."""
     text = file.read_text(encoding="utf-8", errors="ignore")
     if source_name == "EU-Tracker":
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(text, "html.parser")
-        candidates = [a["title"] for a in soup.select("ul li a[title]")]
-    else:
-        candidates = text.splitlines()
-    normalize_companies = normalize_company_name(companies)
-    found = []
-    for c in normalize_companies:
-        if any(is_similar(c, candidate) for candidate in candidates):
-            found.append(c)
-    return found
+        return [a["title"] for a in soup.select("ul li a[title]")]
+    return text.splitlines()
+
+
+def _stream_csv(
+    file: Path, source_name: str, chunk_size: int = 50_000
+) -> List[str]:
+    """
+    Extracts candidate names from a CSV file chunk by chunk. Column types
+    are inferred over the whole file in a first pass, so that values are
+    formatted as by _load_csv, e.g. "nan" for empty cells.
+    """
+    try:
+        return _read_csv_chunks(file, source_name, "utf-8", chunk_size)
+    except Exception:
+        return _read_csv_chunks(file, source_name, "latin1", chunk_size)
+
+
+def _read_csv_chunks(
+    file: Path, source_name: str, encoding: str, chunk_size: int
+) -> List[str]:
+    """Reads a CSV file twice in chunks: for column types, then names."""
+    import pandas as pd
+
+    def chunks(**kwargs):
+        return pd.read_csv(
+            file,
+            encoding=encoding,
+            header=None,
+            chunksize=chunk_size,
+            **kwargs,
+        )
+
+    kinds: dict[int, set[str]] = {}
+    for df in chunks():
+        for column in df.columns:
+            kinds.setdefault(column, set()).add(_csv_chunk_kind(df[column]))
+    column_kinds = {
+        column: _csv_column_kind(chunk_kinds)
+        for column, chunk_kinds in kinds.items()
+    }
+    dtypes = {
+        column: _CSV_KIND_DTYPES[kind]
+        for column, kind in column_kinds.items()
+        if kind in _CSV_KIND_DTYPES
+    }
+    candidates = []
+    for df in chunks(dtype=dtypes):
+        for column, kind in column_kinds.items():
+            if kind == "bool_na":
+                df[column] = df[column].map(_CSV_BOOLEANS, na_action="ignore")
+        if source_name == "OFAC":
+            candidates.extend(df[1].astype(str).tolist())
+        else:
+            candidates.extend(df.astype(str).agg(" ".join, axis=1).tolist())
+    return candidates
+
+
+# Values pandas reads as booleans, and dtypes that make a chunk parse
+# a column the way a whole-file read would
+_CSV_BOOLEANS = {
+    value: flag
+    for flag in (True, False)
+    for value in (str(flag), str(flag).upper(), str(flag).lower())
+}
+_CSV_KIND_DTYPES = {"float": "float64", "str": object, "bool_na": object}
+
+
+def _csv_chunk_kind(column) -> str:
+    """Classifies the values pandas inferred for a column of one chunk."""
+    import pandas as pd
+
+    if column.isna().all():
+        return "na"
+    if column.dtype.kind in "iu":
+        return "int"
+    if column.dtype.kind == "f":
+        return "float"
+    if column.dtype.kind == "b":
+        return "bool"
+    if pd.api.types.infer_dtype(column, skipna=True) == "boolean":
+        return "bool_na"
+    return "str"
+
+
+def _csv_column_kind(chunk_kinds: set[str]) -> str:
+    """
+    Combines chunk kinds into the kind pandas infers for the whole column:
+    numbers with empty cells become floats, booleans with empty cells
+    stay Python booleans, and a mix of numbers and booleans stays text.
+    """
+    if chunk_kinds == {"na"}:
+        return "float"
+    if chunk_kinds <= {"na", "int", "float"}:
+        return "int" if chunk_kinds == {"int"} else "float"
+    if chunk_kinds <= {"na", "bool", "bool_na"}:
+        return "bool" if chunk_kinds == {"bool"} else "bool_na"
+    return "str"
+
+
+def _stream_xml(file: Path, source_name: str) -> List[str]:
+    """
+    Extracts candidate names from an XML file with iterparse, clearing
+    elements as soon as they are processed.
+    """
+    if source_name not in ("UK", "UN", "UN-SC"):
+        return _stream_xml_text(file)
+    candidates = []
+    path = []
+    # Names of every INDIVIDUAL, in the order the elements start
+    individuals: List[List[str]] = []
+    open_individuals: List[int] = []
+    for event, elem in ET.iterparse(file, events=("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            # findall(".//INDIVIDUAL") does not match the root itself
+            if elem.tag == "INDIVIDUAL" and len(path) > 1:
+                open_individuals.append(len(individuals))
+                individuals.append([])
+            continue
+        if source_name == "UK":
+            if (
+                len(path) > 3
+                and path[-3:] == ["Names", "Name", "Name6"]
+                and elem.text
+            ):
+                candidates.append(elem.text.strip())
+        elif elem.tag == "INDIVIDUAL" and len(path) > 1:
+            names = individuals[open_individuals.pop()]
+            for tag in ("FIRST_NAME", "SECOND_NAME"):
+                value = elem.findtext(tag)
+                if value:
+                    names.append(value.strip())
+            for alias in elem.findall("INDIVIDUAL_ALIAS"):
+                alias_name = alias.findtext("ALIAS_NAME")
+                if alias_name and alias_name.strip():
+                    names.append(alias_name.strip())
+        path.pop()
+        # Children of INDIVIDUAL are still needed when it ends
+        if not open_individuals:
+            elem.clear()
+    if source_name == "UK":
+        return candidates
+    return [name for names in individuals for name in names]
+
+
+class _TextLines:
+    """
+    Parser target splitting the text of an XML document into stripped
+    non-empty lines, like ET.tostring(root, method="text") in _load_xml.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self._partial = ""
+
+    def data(self, data: str):
+        parts = (self._partial + data).splitlines(keepends=True)
+        self._partial = ""
+        # A last part without a line break may continue in the next data
+        if parts and parts[-1].splitlines() == parts[-1:]:
+            self._partial = parts.pop()
+        self._add(parts)
+
+    def close(self) -> List[str]:
+        self._add([self._partial])
+        self._partial = ""
+        return self.lines
+
+    def _add(self, parts: List[str]):
+        self.lines.extend(part.strip() for part in parts if part.strip())
+
+
+def _stream_xml_text(file: Path, chunk_size: int = 1024 * 1024) -> List[str]:
+    """Extracts text lines of an XML file fed to the parser in chunks."""
+    parser = ET.XMLParser(target=_TextLines())
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            parser.feed(chunk)
+    return parser.close()
+
+
+# Elements without content, which BeautifulSoup never keeps open
+_VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+
+class _TitleLinkParser(HTMLParser):
+    """
+    Collects titles of links nested in list items, like "ul li a[title]".
+    Open elements are tracked the way BeautifulSoup does: an end tag
+    closes the latest element with its name and everything opened after
+    it, and an end tag without such an element is ignored.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.titles: List[str] = []
+        self._open: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" and self._inside_list_item():
+            title = dict(attrs).get("title", False)
+            if title is not False:
+                # BeautifulSoup reads an attribute without a value as ""
+                self.titles.append(title or "")
+        if tag not in _VOID_ELEMENTS:
+            self._open.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._open:
+            index = len(self._open) - 1 - self._open[::-1].index(tag)
+            del self._open[index:]
+
+    def _inside_list_item(self) -> bool:
+        """Checks whether an open li is nested in an open ul."""
+        inside_list = False
+        for tag in self._open:
+            if tag == "ul":
+                inside_list = True
+            elif tag == "li" and inside_list:
+                return True
+        return False
+
+
+def _stream_html(
+    file: Path, source_name: str, chunk_size: int = 1024 * 1024
+) -> List[str]:
+    """Extracts candidate names from an HTML file read in chunks."""
+    with open(file, encoding="utf-8", errors="ignore") as f:
+        if source_name != "EU-Tracker":
+            # Lines are split as by str.splitlines in _load_html
+            return [part for line in f for part in line.splitlines()]
+        parser = _TitleLinkParser()
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            parser.feed(chunk)
+        parser.close()
+    return parser.titles
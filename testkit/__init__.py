@@ -0,0 +1,126 @@
+"""
+Helpers shared by the tests, benchmarks and load tests: the environment
+settings require and synthetic company names.
+"""
+
+import os
+import random
+import statistics
+
+# Settings require these; only the Postgres tests connect to a service,
+# on the ports of docker-compose
+SERVICE_ENV = {
+    "BOT_TOKEN": "123456:test",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5433",
+    "DB_NAME": "sanctions_bot",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6380",
+}
+
+SYLLABLES = (
+    "ka ro ma shi ne ta lo vi den gro tra mer sto pol nik zar bel "
+    "in vest tek sol gaz ner ol fin kom ser"
+).split()
+LEGAL_FORMS = ["", "", "LLC", "LTD", "JSC", "Inc", "GmbH"]
+LATIN_TO_CYRILLIC = dict(
+    zip("abvgdezijklmnoprstufhc", "абвгдезийклмнопрстуфхц")
+)
+# Spellings of a listed name that a user might upload
+VARIANTS = (
+    "typo",
+    "order",
+    "form",
+    "cyrillic",
+    "extra",
+    "extended",
+    "fewer",
+    "case",
+)
+
+
+def set_default_env(**overrides: str):
+    """Sets SERVICE_ENV and overrides in os.environ where not set yet."""
+    for key, value in {**SERVICE_ENV, **overrides}.items():
+        os.environ.setdefault(key, value)
+
+
+def random_word(
+    rng: random.Random, syllables: tuple[int, int] = (2, 4)
+) -> str:
+    """Builds a capitalized word from random syllables."""
+    return "".join(
+        rng.choices(SYLLABLES, k=rng.randint(*syllables))
+    ).capitalize()
+
+
+def random_name(
+    rng: random.Random,
+    words: tuple[int, int] = (1, 3),
+    syllables: tuple[int, int] = (2, 4),
+    legal_forms: list[str] = LEGAL_FORMS,
+) -> str:
+    """Builds a company-like name from random syllables."""
+    parts = [
+        random_word(rng, syllables) for _ in range(rng.randint(*words))
+    ]
+    if legal_forms:
+        parts.append(rng.choice(legal_forms))
+    return " ".join(parts).strip()
+
+
+def to_cyrillic(name: str) -> str:
+    """Spells a Latin name in Cyrillic letters, lowercased."""
+    return "".join(LATIN_TO_CYRILLIC.get(ch, ch) for ch in name.lower())
+
+
+def exhaustive_matches(
+    companies: list[str], names: list[str], keys: list[str], threshold: int
+) -> list[str]:
+    """
+    Matches every company against every listed name and match key, the
+    reference for the indexed matching of compiled candidates.
+    """
+    from src.utils.text_utils import is_similar, match_key
+
+    return [
+        company
+        for company in companies
+        if any(is_similar(company, name, threshold) for name in names)
+        or any(is_similar(match_key(company), key, threshold) for key in keys)
+    ]
+
+
+def variant(
+    name: str, rng: random.Random, kinds: tuple[str, ...] = VARIANTS
+) -> str:
+    """Returns a spelling of a listed name of one of the given kinds."""
+    kind = rng.choice(kinds)
+    if kind == "typo" and name:
+        i = rng.randrange(len(name))
+        return name[:i] + rng.choice("aeiouxz") + name[i + 1 :]
+    if kind == "order":
+        return " ".join(reversed(name.split()))
+    if kind == "form":
+        return f"{name} {rng.choice(['LLC', 'LTD', 'JSC'])}"
+    if kind == "cyrillic":
+        return f"ООО {to_cyrillic(name)}"
+    if kind == "extra":
+        return f"{name} {random_word(rng)}"
+    if kind == "extended":
+        # The listed name is a small part of a long upload
+        return f"{name} {random_name(rng, (2, 3))} {random_name(rng, (2, 3))}"
+    if kind == "fewer":
+        return " ".join(name.split()[:-1])
+    if kind == "case":
+        return name.upper()
+    return name
+
+
+def percentile(values: list[float], q: int) -> float:
+    """Returns the q-th percentile of the values."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
@@ -0,0 +1,3 @@
+from testkit import set_default_env
+
+set_default_env(TRACE_EXPORTER="none")
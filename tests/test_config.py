@@ -0,0 +1,20 @@
+import os
+import pytest
+from pydantic import ValidationError
+from src.core.config import Settings
+
+
+def test_webhook_mode_requires_base_url():
+    with pytest.raises(ValidationError, match="WEBHOOK_BASE_URL"):
+        Settings(BOT_MODE="webhook", WEBHOOK_BASE_URL="")
+
+
+def test_webhook_mode_with_base_url():
+    settings = Settings(
+        BOT_MODE="webhook", WEBHOOK_BASE_URL="https://bot.example.com"
+    )
+    assert settings.WEBHOOK_BASE_URL == "https://bot.example.com"
+
+
+def test_match_workers_default_to_usable_cpus():
+    assert Settings().MATCH_WORKERS == len(os.sched_getaffinity(0))
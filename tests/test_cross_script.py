@@ -0,0 +1,64 @@
+import random
+import pytest
+from src.core.config import settings
+from src.utils.web_scraper import compile_candidates, match_companies
+from testkit import exhaustive_matches, random_name, to_cyrillic
+
+# (upload, listed name, same company) at the default threshold
+LABELLED_PAIRS = [
+    ("ООО Ромашка", "ROMASHKA LLC", True),
+    ("ООО Ромашка", "Romaschka LLC", True),
+    ("АО Газпром нефть", "GAZPROM NEFT JSC", True),
+    ("Хлебзавод", "HLEBZAVOD LTD", True),
+    ("Цемент Торг", "TSEMENT TORG", True),
+    ("Щукин Трейд", "SHCHUKIN TRADE", True),
+    ("Альфа Строй", "ALPHA STROY", True),
+    ("ПАО Северсталь", "SEVERSTAL", True),
+    ("Техснаб", "TECHSNAB", True),
+    # Same phonetic key, different names
+    ("Мега Строй", "MAGA STAR LTD", False),
+    ("Мир Трейд", "MORE TRADE", False),
+    ("Нико Трейд", "NIKA TRADE", False),
+    ("Вектор", "VIKTOR", False),
+    ("Восток Нефть", "VOSTOK GAZ", False),
+]
+
+
+
+
+@pytest.mark.parametrize("upload, listed, same", LABELLED_PAIRS)
+def test_cyrillic_upload_against_latin_list(upload, listed, same):
+    found = match_companies(
+        [upload], compile_candidates([listed]), settings.MATCH_THRESHOLD
+    )
+    assert bool(found) is same
+
+
+@pytest.mark.parametrize("listed, upload, same", LABELLED_PAIRS)
+def test_latin_upload_against_cyrillic_list(listed, upload, same):
+    found = match_companies(
+        [upload], compile_candidates([listed]), settings.MATCH_THRESHOLD
+    )
+    assert bool(found) is same
+
+
+def short_name(rng: random.Random) -> str:
+    return random_name(rng, words=(1, 2), syllables=(2, 3), legal_forms=[])
+
+
+def test_indexed_matching_equals_exhaustive_scan():
+    rng = random.Random(7)
+    listed = [short_name(rng).upper() for _ in range(1000)]
+    uploads = [
+        to_cyrillic(
+            rng.choice(listed) if rng.random() < 0.3 else short_name(rng)
+        )
+        for _ in range(100)
+    ]
+    threshold = settings.MATCH_THRESHOLD
+    compiled = compile_candidates(listed)
+    found = match_companies(uploads, compiled, threshold)
+    assert found == exhaustive_matches(
+        uploads, listed, compiled.keys, threshold
+    )
+    assert len(found) >= 30
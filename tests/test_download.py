@@ -0,0 +1,173 @@
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from pydantic import ValidationError
+from src.core.config import Settings, settings
+from src.utils.web_scraper import DownloadError, download_file
+
+
+class FaultyServer:
+    """
+    Serves one file and fails requests as planned: every planned fault is
+    used by one request, later requests are served normally.
+    Faults are ("truncate", bytes), ("slow", seconds) and ("status", code).
+    Releases publish a new (content, etag) before the request with the
+    given index.
+    """
+
+    def __init__(self, content: bytes, etag: str | None = '"v1"'):
+        self.content = content
+        self.etag = etag
+        self.faults: list[tuple[str, float]] = []
+        self.releases: dict[int, tuple[bytes, str]] = {}
+        self.requests: list[dict] = []
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/list.xml"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if len(server.requests) in server.releases:
+                    release = server.releases[len(server.requests)]
+                    server.content, server.etag = release
+                server.requests.append(dict(self.headers))
+                fault, value = (
+                    server.faults.pop(0) if server.faults else ("", 0)
+                )
+                if fault == "slow":
+                    time.sleep(value)
+                if fault == "status":
+                    self.send_error(int(value))
+                    return
+                content, start = server.content, 0
+                range_header = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if range_header and if_range in (None, server.etag):
+                    start = int(range_header[len("bytes=") : -1])
+                    self.send_response(206)
+                    self.send_header(
+                        "Content-Range",
+                        f"bytes {start}-{len(content) - 1}/{len(content)}",
+                    )
+                else:
+                    self.send_response(200)
+                body = content[start:]
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes")
+                if server.etag:
+                    self.send_header("ETag", server.etag)
+                self.end_headers()
+                if fault == "truncate":
+                    body = body[: int(value)]
+                self.wfile.write(body)
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+@pytest.fixture(autouse=True)
+def fast_downloads(monkeypatch):
+    monkeypatch.setattr(settings, "DOWNLOAD_RETRIES", 3)
+    monkeypatch.setattr(settings, "DOWNLOAD_BACKOFF", 0)
+    monkeypatch.setattr(settings, "DOWNLOAD_READ_TIMEOUT", 0.5)
+    monkeypatch.setattr(settings, "DOWNLOAD_CHUNK_SIZE", 256)
+
+
+CONTENT = b"".join(b"<NAME>Company %05d</NAME>\n" % i for i in range(400))
+
+
+def test_download_returns_content_hash(tmp_path):
+    target = tmp_path / "list.xml"
+    with FaultyServer(CONTENT) as server:
+        digest = download_file(server.url, target)
+    assert target.read_bytes() == CONTENT
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_truncated_download_is_resumed_with_if_range(tmp_path):
+    target = tmp_path / "list.xml"
+    with FaultyServer(CONTENT) as server:
+        server.faults = [("truncate", 3000)]
+        digest = download_file(server.url, target)
+    assert target.read_bytes() == CONTENT
+    assert digest == hashlib.sha256(CONTENT).hexdigest()
+    assert len(server.requests) == 2
+    # The last partial chunk before the break may be lost, not more
+    offset = int(server.requests[1]["Range"][len("bytes=") : -1])
+    assert 3000 - settings.DOWNLOAD_CHUNK_SIZE < offset <= 3000
+    assert server.requests[1]["If-Range"] == '"v1"'
+
+
+def test_list_changed_between_attempts_is_not_spliced(tmp_path):
+    target = tmp_path / "list.xml"
+    updated = CONTENT.replace(b"Company", b"Holding")
+    with FaultyServer(CONTENT) as server:
+        server.faults = [("truncate", 3000)]
+        server.releases = {1: (updated, '"v2"')}
+        digest = download_file(server.url, target)
+    assert server.requests[1]["If-Range"] == '"v1"'
+    assert target.read_bytes() == updated
+    assert digest == hashlib.sha256(updated).hexdigest()
+
+
+def test_download_without_validator_starts_over(tmp_path):
+    target = tmp_path / "list.xml"
+    with FaultyServer(CONTENT, etag=None) as server:
+        server.faults = [("truncate", 3000)]
+        download_file(server.url, target)
+    assert "Range" not in server.requests[1]
+    assert target.read_bytes() == CONTENT
+
+
+def test_slow_response_is_retried(tmp_path):
+    target = tmp_path / "list.xml"
+    with FaultyServer(CONTENT) as server:
+        server.faults = [("slow", 1.5)]
+        download_file(server.url, target)
+    assert len(server.requests) == 2
+    assert target.read_bytes() == CONTENT
+
+
+def test_failed_download_keeps_previous_copy(tmp_path):
+    target = tmp_path / "list.xml"
+    target.write_bytes(b"previous version")
+    with FaultyServer(CONTENT) as server:
+        server.faults = [("truncate", 100)] * 3
+        with pytest.raises(DownloadError):
+            download_file(server.url, target)
+    assert len(server.requests) == 3
+    assert target.read_bytes() == b"previous version"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_client_error_is_not_retried(tmp_path):
+    target = tmp_path / "list.xml"
+    with FaultyServer(CONTENT) as server:
+        server.faults = [("status", 404)]
+        with pytest.raises(DownloadError):
+            download_file(server.url, target)
+    assert len(server.requests) == 1
+    assert not target.exists()
+
+
+def test_download_retries_must_allow_one_attempt():
+    with pytest.raises(ValidationError):
+        Settings(DOWNLOAD_RETRIES=0)
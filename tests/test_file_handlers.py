@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from collections import Counter
+import pytest
+from src.core.config import settings
+from src.services import sanctions_service
+from src.services.job_scheduler import FairScheduler
+from src.utils.file_handlers import (
+    ReportTooLarge,
+    iter_result_rows,
+    open_report,
+    save_results,
+)
+
+COMPANIES = [f"Company {i:06d} Holding LLC" for i in range(40_000)]
+RESULTS = {"OFAC": COMPANIES[:10], "EU": [], "UK": None}
+
+
+def test_report_above_limit_is_zipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_UPLOAD_LIMIT_MB", 1)
+    report = save_results(
+        RESULTS, COMPANIES, COMPANIES, str(tmp_path / "report"), "csv"
+    )
+    assert report.endswith(".csv.zip")
+    assert [p.name for p in tmp_path.iterdir()] == ["report.csv.zip"]
+
+
+def test_zipped_report_above_limit_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_UPLOAD_LIMIT_MB", 0)
+    with pytest.raises(ReportTooLarge):
+        save_results(
+            RESULTS, COMPANIES, COMPANIES, str(tmp_path / "report"), "csv"
+        )
+    assert list(tmp_path.iterdir()) == []
+
+
+def read_report(path: str, report_format: str) -> list:
+    if report_format == "xlsx":
+        from openpyxl import load_workbook
+
+        sheet = load_workbook(path, read_only=True).active
+        return list(sheet.iter_rows(values_only=True))
+    if report_format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pylist()
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.parametrize("report_format", ["xlsx", "csv", "parquet", "jsonl"])
+def test_report_written_by_chunks_equals_whole_report(
+    tmp_path, report_format
+):
+    companies = COMPANIES[:25]
+    results = {"OFAC": companies[3:12:2], "EU": [], "UK": None}
+    whole = save_results(
+        results, companies, companies, str(tmp_path / "whole"), report_format
+    )
+    report = open_report(
+        str(tmp_path / "chunks"), report_format, list(results), 25
+    )
+    for start in range(0, 25, 7):
+        rows = slice(start, start + 7)
+        report.write(
+            iter_result_rows(results, companies[rows], companies[rows])
+        )
+    chunked = report.close()
+    assert chunked.endswith(f"chunks.{report_format}")
+    assert read_report(chunked, report_format) == read_report(
+        whole, report_format
+    )
+
+
+def test_rows_are_delivered_in_order_as_chunks_finish(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_USE_PROCESSES", False)
+    monkeypatch.setattr(
+        sanctions_service, "scheduler", FairScheduler(4, per_user_limit=4)
+    )
+    first_written = threading.Event()
+    events = []
+
+    def match(companies, source_versions, threshold):
+        if companies == ["B"]:
+            # The second chunk finishes only after the first is written
+            assert first_written.wait(5)
+        events.append(f"matched {companies[0]}")
+        return {"OFAC": [c for c in companies if c in ("A", "C")]}, Counter()
+
+    async def write_rows(rows: slice, chunk_results: dict):
+        events.append(f"written {rows.start}:{rows.stop}")
+        chunk = list("ABCD")[rows]
+        assert chunk_results["OFAC"] == [c for c in chunk if c in ("A", "C")]
+        assert chunk_results["EU"] is None
+        first_written.set()
+
+    monkeypatch.setattr(sanctions_service, "match_chunk", match)
+    results = asyncio.run(
+        sanctions_service.match_in_chunks(
+            list("ABCD"),
+            {"OFAC": "v1"},
+            user_id=1,
+            chunk_size=1,
+            on_chunk=write_rows,
+        )
+    )
+    assert results["OFAC"] == ["A", "C"]
+    written = [event for event in events if event.startswith("written")]
+    assert written == [f"written {i}:{i + 1}" for i in range(4)]
+    assert events.index("written 0:1") < events.index("matched B")
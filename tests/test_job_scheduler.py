@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import contextvars
+import pytest
+from src.core.config import settings
+from src.services.job_scheduler import FairScheduler
+
+job_var: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "job", default="-"
+)
+
+
+@pytest.fixture(autouse=True)
+def thread_workers(monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_USE_PROCESSES", False)
+
+
+class Chunks:
+    """Blocking chunk function that records chunks as they start."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.gate = threading.Event()
+
+    def __call__(self, label: str) -> str:
+        self.started.append(label)
+        self.gate.wait(10)
+        return label
+
+    async def wait_started(self, count: int):
+        for _ in range(1000):
+            if len(self.started) >= count:
+                return
+            await asyncio.sleep(0.01)
+        raise TimeoutError(f"Only {self.started} started")
+
+
+def submit_all(
+    scheduler: FairScheduler, chunks: Chunks, jobs: dict[int, list[str]]
+) -> list[asyncio.Task]:
+    """Queues the chunks of several users at once."""
+    return [
+        asyncio.create_task(
+            scheduler.submit(
+                user_id, chunks, label, cost=10 if "big" in label else 1
+            )
+        )
+        for user_id, labels in jobs.items()
+        for label in labels
+    ]
+
+
+def run_scenario(scheduler: FairScheduler, scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            for task in scheduler._worker_tasks:
+                task.cancel()
+
+    return asyncio.run(main())
+
+
+def test_small_job_is_served_between_chunks_of_a_large_one():
+    scheduler = FairScheduler(workers=1, per_user_limit=1)
+    chunks = Chunks()
+
+    async def scenario():
+        large = submit_all(scheduler, chunks, {1: ["L0", "L1", "L2", "L3"]})
+        await chunks.wait_started(1)
+        small = submit_all(scheduler, chunks, {2: ["S0"]})
+        await asyncio.sleep(0.05)
+        chunks.gate.set()
+        await asyncio.gather(*large, *small)
+
+    run_scenario(scheduler, scenario)
+    assert chunks.started == ["L0", "S0", "L1", "L2", "L3"]
+
+
+def test_user_limit_holds_while_others_wait():
+    scheduler = FairScheduler(workers=3, per_user_limit=2)
+    chunks = Chunks()
+
+    async def scenario():
+        # By finish time alone the third worker would take A2
+        tasks = submit_all(
+            scheduler, chunks, {1: ["A0", "A1", "A2", "A3"], 2: ["B-big"]}
+        )
+        await chunks.wait_started(3)
+        running = sorted(chunks.started)
+        chunks.gate.set()
+        await asyncio.gather(*tasks)
+        return running
+
+    assert run_scenario(scheduler, scenario) == ["A0", "A1", "B-big"]
+
+
+def test_user_limit_is_lifted_for_a_lone_user():
+    scheduler = FairScheduler(workers=3, per_user_limit=2)
+    chunks = Chunks()
+
+    async def scenario():
+        tasks = submit_all(scheduler, chunks, {1: ["A0", "A1", "A2", "A3"]})
+        await chunks.wait_started(3)
+        running = sorted(chunks.started)
+        chunks.gate.set()
+        await asyncio.gather(*tasks)
+        return running
+
+    assert run_scenario(scheduler, scenario) == ["A0", "A1", "A2"]
+    assert scheduler._queues == {}
+
+
+def read_job_var(delay: float) -> str:
+    asyncio.run(asyncio.sleep(delay))
+    return job_var.get()
+
+
+async def run_job(scheduler: FairScheduler, user_id: int, job: str | None):
+    if job is not None:
+        job_var.set(job)
+    return await asyncio.gather(
+        *(scheduler.submit(user_id, read_job_var, 0.01) for _ in range(3))
+    )
+
+
+def test_chunks_run_in_the_context_of_their_job(monkeypatch):
+    scheduler = FairScheduler(workers=2, per_user_limit=1)
+    # Picking the next chunk runs in the worker tasks themselves
+    seen_by_workers = []
+    next_user = scheduler._next_user
+
+    def record_next_user():
+        seen_by_workers.append(job_var.get())
+        return next_user()
+
+    monkeypatch.setattr(scheduler, "_next_user", record_next_user)
+
+    async def scenario():
+        results = await asyncio.gather(
+            run_job(scheduler, 1, "first"),
+            run_job(scheduler, 2, "second"),
+            run_job(scheduler, 3, None),
+        )
+        for task in scheduler._worker_tasks:
+            task.cancel()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == [["first"] * 3, ["second"] * 3, ["-"] * 3]
+    # Workers do not keep the context of the job that started them
+    assert set(seen_by_workers) == {"-"}
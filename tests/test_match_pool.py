@@ -0,0 +1,28 @@
+import logging
+from pathlib import Path
+from src.core.config import settings
+from src.utils.web_scraper import get_match_executor, shutdown_match_executor
+
+
+def log_in_worker(message: str) -> list[str]:
+    logging.getLogger("match_pool").info(message)
+    return sorted(type(h).__name__ for h in logging.getLogger().handlers)
+
+
+def test_matching_processes_write_to_the_bot_logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "MATCH_USE_PROCESSES", True)
+    monkeypatch.setattr(settings, "MATCH_WORKERS", 2)
+    try:
+        handlers = get_match_executor().submit(log_in_worker, "From worker")
+        handlers = handlers.result(timeout=60)
+    finally:
+        shutdown_match_executor()
+    # The bot rotates the files, workers reopen them after a rotation
+    assert handlers == [
+        "StreamHandler",
+        "WatchedFileHandler",
+        "WatchedFileHandler",
+    ]
+    log = Path("logs/general/app.log").read_text(encoding="utf-8")
+    assert "From worker" in log
@@ -0,0 +1,109 @@
+import time
+import asyncio
+import pytest
+from src.core.config import settings
+from src.services import sanctions_service
+from src.services.job_scheduler import FairScheduler
+from src.utils.memory import MemoryBudgetExceeded, MemoryTracker
+
+BUDGET = 10 << 20
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """Replaces the sampled RSS with a value set by the test."""
+    value = {"bytes": 0}
+    monkeypatch.setattr(MemoryTracker, "_rss", lambda self: value["bytes"])
+    return value
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id: int, text: str):
+        self.messages.append((chat_id, text))
+
+
+def test_check_raises_once_a_stage_exceeds_the_budget(rss):
+    with MemoryTracker(BUDGET, interval=3600) as tracker:
+        with tracker.stage("load"):
+            rss["bytes"] = BUDGET // 2
+            tracker.check()
+        with pytest.raises(MemoryBudgetExceeded, match="stage match"):
+            with tracker.stage("match"):
+                rss["bytes"] = BUDGET * 2
+                tracker._record()
+                tracker.check()
+        # A stage is not started once the budget has been exceeded
+        with pytest.raises(MemoryBudgetExceeded) as error:
+            with tracker.stage("report"):
+                pass
+    assert error.value.other_jobs == 0
+    assert tracker.peaks == {"load": BUDGET // 2, "match": BUDGET * 2}
+
+
+def test_jobs_running_at_the_same_time_are_reported(rss):
+    with MemoryTracker(BUDGET, interval=3600), MemoryTracker(
+        BUDGET, interval=3600
+    ) as tracker:
+        with pytest.raises(MemoryBudgetExceeded) as error:
+            with tracker.stage("match"):
+                rss["bytes"] = BUDGET * 2
+                tracker._record()
+                tracker.check()
+    assert error.value.other_jobs == 1
+    assert "1 other job(s) running" in str(error.value)
+
+
+def test_matching_stops_at_the_first_chunk_over_the_budget(rss, monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_USE_PROCESSES", False)
+    monkeypatch.setattr(
+        sanctions_service, "scheduler", FairScheduler(1, per_user_limit=1)
+    )
+    matched = []
+
+    def grow_memory(companies, source_versions, threshold):
+        matched.extend(companies)
+        rss["bytes"] = BUDGET * 2
+        # Wait for the sampling thread to see the growth
+        deadline = time.monotonic() + 5
+        while not tracker.exceeded and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        return {}, {}
+
+    monkeypatch.setattr(sanctions_service, "match_chunk", grow_memory)
+    with MemoryTracker(BUDGET, interval=0.01) as tracker:
+        with pytest.raises(MemoryBudgetExceeded):
+            with tracker.stage("match"):
+                asyncio.run(
+                    sanctions_service.match_in_chunks(
+                        ["A", "B", "C", "D"],
+                        {},
+                        user_id=1,
+                        chunk_size=1,
+                        tracker=tracker,
+                    )
+                )
+    # The next chunk was already running when the first one was checked
+    assert matched == ["A", "B"]
+
+
+def test_upload_over_the_budget_is_rejected(tmp_path, monkeypatch):
+    async def no_sources():
+        return {}
+
+    monkeypatch.setattr(sanctions_service, "download_sources", no_sources)
+    monkeypatch.setattr(settings, "JOB_MEMORY_BUDGET_MB", 1)
+    monkeypatch.setattr(settings, "REPORT_CACHE_DIR", str(tmp_path / "c"))
+    upload = tmp_path / "companies.xlsx"
+    # Predicted at 20 times the file size, i.e. above 1 MB
+    upload.write_bytes(b"0" * 100_000)
+    bot = FakeBot()
+    asyncio.run(sanctions_service.check_sanctions(str(upload), 42, bot))
+    assert len(bot.messages) == 1
+    chat_id, text = bot.messages[0]
+    assert chat_id == 42
+    assert "too large to be checked within the memory limit" in text
+    assert not upload.exists()
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+from src.core.config import settings
+from src.utils import report_cache
+from src.utils.report_cache import (
+    build_report_key,
+    evict_reports,
+    get_cached_report,
+    store_report,
+)
+
+KEY_ARGS = (
+    "a" * 64,
+    {"OFAC": "1" * 64, "EU": "2" * 64},
+    85,
+    "xlsx",
+    "memory",
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setattr(settings, "REPORT_CACHE_DIR", str(path))
+    monkeypatch.setattr(settings, "REPORT_CACHE_MAX_FILES", 3)
+    monkeypatch.setattr(settings, "REPORT_CACHE_TTL_HOURS", 1)
+    path.mkdir()
+    return path
+
+
+def cached(cache_dir, name: str, age_minutes: float):
+    path = cache_dir / name
+    path.write_text(name)
+    mtime = time.time() - age_minutes * 60
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_report_key_is_stable_across_processes():
+    script = (
+        "from src.utils.report_cache import build_report_key; "
+        f"print(build_report_key(*{KEY_ARGS!r}))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "PYTHONHASHSEED": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == build_report_key(*KEY_ARGS)
+    # Lists are hashed in name order, whatever order they were downloaded
+    upload, versions, *rest = KEY_ARGS
+    reordered = dict(reversed(versions.items()))
+    assert build_report_key(upload, reordered, *rest) == output.strip()
+
+
+@pytest.mark.parametrize(
+    "position, value",
+    [
+        (0, "b" * 64),
+        (1, {"OFAC": "1" * 64, "EU": "3" * 64}),
+        (1, {"OFAC": "1" * 64}),
+        (2, 90),
+        (3, "csv"),
+        (4, "postgres"),
+    ],
+)
+def test_report_key_covers_every_input(position, value):
+    args = list(KEY_ARGS)
+    args[position] = value
+    assert build_report_key(*args) != build_report_key(*KEY_ARGS)
+
+
+def test_report_key_covers_the_matching_version(monkeypatch):
+    key = build_report_key(*KEY_ARGS)
+    monkeypatch.setattr(report_cache, "MATCHING_VERSION", 2)
+    assert build_report_key(*KEY_ARGS) != key
+
+
+def test_expired_reports_are_evicted(cache_dir):
+    fresh = cached(cache_dir, "fresh.xlsx", age_minutes=10)
+    expired = cached(cache_dir, "expired.xlsx", age_minutes=61)
+    evict_reports()
+    assert fresh.exists()
+    assert not expired.exists()
+    assert get_cached_report("fresh") == fresh
+
+
+def test_least_recently_used_reports_are_evicted(cache_dir):
+    reports = [
+        cached(cache_dir, f"report{i}.csv", age_minutes=50 - i)
+        for i in range(5)
+    ]
+    # A cache hit makes the oldest report the most recently used one
+    assert get_cached_report("report0") == reports[0]
+    partial = cached(cache_dir, "report5.csv.123.tmp", age_minutes=55)
+    evict_reports()
+    assert sorted(p.name for p in cache_dir.iterdir()) == [
+        "report0.csv",
+        "report3.csv",
+        "report4.csv",
+        partial.name,
+    ]
+
+
+def test_stored_report_keeps_every_suffix(cache_dir, tmp_path):
+    report = tmp_path / "sanctions.csv.zip"
+    report.write_bytes(b"zip")
+    store_report("key", report)
+    assert get_cached_report("key") == cache_dir / "key.csv.zip"
+    assert get_cached_report("other") is None
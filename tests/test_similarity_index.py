@@ -0,0 +1,69 @@
+import random
+from collections import Counter
+import pytest
+from src.utils.text_utils import SimilarityIndex, is_similar
+from testkit import random_name, variant
+
+THRESHOLDS = [0, 1, 50, 70, 85, 90, 95, 99, 100, 101]
+QUERY_VARIANTS = ("typo", "order", "extra", "fewer", "case")
+NAMES = [
+    "Romashka LLC",
+    "Gazprom Neft",
+    "Severstal",
+    "Northern Shipping and Trading Holding Company",
+]
+
+
+def short_name(rng: random.Random) -> str:
+    return random_name(rng, words=(1, 4), syllables=(1, 3), legal_forms=[])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_index_matches_exhaustive_scan(seed):
+    rng = random.Random(seed)
+    names = [short_name(rng) for _ in range(150)] + ["", "  ", "LLC"]
+    queries = [
+        variant(rng.choice(names), rng, QUERY_VARIANTS) for _ in range(60)
+    ]
+    queries += [short_name(rng) for _ in range(60)] + ["", "-", "Llc"]
+    index = SimilarityIndex(names)
+    stats = Counter()
+    for threshold in THRESHOLDS:
+        for query in queries:
+            expected = any(is_similar(query, n, threshold) for n in names)
+            found = index.contains_similar(query, threshold, stats)
+            assert found == expected, (query, threshold)
+    # Every tier of the cascade took part in the comparison
+    assert stats.keys() == {"exact", "token", "length", "pruned", "miss"}
+
+
+def test_empty_index_finds_nothing():
+    index = SimilarityIndex([])
+    for threshold in THRESHOLDS:
+        assert not index.contains_similar("Romashka", threshold)
+
+
+@pytest.mark.parametrize(
+    "query, found, tiers",
+    [
+        ("llc ROMASHKA", True, {"exact": 1}),
+        ("Gazprom Neft Trading", True, {"token": 1}),
+        # Only the long name is outside the length window of the typo
+        ("Severstai", True, {"length": 1, "pruned": 1}),
+        ("Gazprom Oil", False, {"miss": 1, "pruned": 1}),
+        ("Xyzzy", False, {"miss": 1, "pruned": 4}),
+        ("", False, {"miss": 1}),
+    ],
+)
+def test_tier_counters(query, found, tiers):
+    stats = Counter()
+    assert SimilarityIndex(NAMES).contains_similar(query, 85, stats) is found
+    assert stats == Counter(tiers)
+
+
+def test_thresholds_outside_scores_skip_the_tiers():
+    index = SimilarityIndex(NAMES)
+    stats = Counter()
+    assert index.contains_similar("Xyzzy", 0, stats)
+    assert not index.contains_similar("Severstal", 101, stats)
+    assert not stats
@@ -0,0 +1,126 @@
+import io
+import json
+import tarfile
+from pathlib import Path
+import pytest
+from src.core.config import settings
+from src.services.snapshot import export_snapshot, import_snapshot
+from src.utils import web_scraper
+from src.utils.report_cache import file_sha256
+from src.utils.web_scraper import compile_candidates, get_cached_candidates
+
+SOURCES = {
+    "OFAC": "1,ROMASHKA LLC,-0-\n2,GAZPROM NEFT JSC,-0-\n",
+    "EU-Tracker": (
+        '<ul><li><a title="Ромашка ООО">x</a></li>'
+        '<li><a title="Severstal">y</a></li></ul>'
+    ),
+}
+
+
+@pytest.fixture
+def lists(tmp_path, monkeypatch):
+    """Writes downloaded lists and returns their versions."""
+    monkeypatch.setattr(settings, "TMP_DIR_SCRAPER", str(tmp_path / "lists"))
+    monkeypatch.setattr(settings, "MATCH_USE_PROCESSES", False)
+    monkeypatch.setattr(web_scraper, "_compiled_sources", {})
+    (tmp_path / "lists").mkdir()
+    versions = {}
+    for name, content in SOURCES.items():
+        ext = settings.SANCTIONS_SOURCES[name]["ext"]
+        path = tmp_path / "lists" / f"{name}{ext}"
+        path.write_text(content, encoding="utf-8")
+        versions[name] = file_sha256(path)
+    return versions
+
+
+def rewrite_bundle(path: Path, member: str, change):
+    """Replaces a file of a bundle with change(its content)."""
+    with tarfile.open(path, "r:gz") as archive:
+        files = {
+            info.name: archive.extractfile(info).read()
+            for info in archive.getmembers()
+        }
+    files[member] = change(files[member])
+    with tarfile.open(path, "w:gz") as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+def change_manifest(**fields):
+    def change(data: bytes) -> bytes:
+        return json.dumps({**json.loads(data), **fields}).encode()
+
+    return change
+
+
+def imported_lists(tmp_path, bundle: Path) -> dict[str, str]:
+    """Imports a bundle into a bot that has nothing downloaded."""
+    for path in (tmp_path / "lists").iterdir():
+        path.unlink()
+    web_scraper._compiled_sources.clear()
+    return import_snapshot(bundle)
+
+
+def test_snapshot_round_trip(tmp_path, lists):
+    bundle = tmp_path / "snapshot.tar.gz"
+    export_snapshot(bundle, lists)
+    exported = {
+        name: get_cached_candidates(name, version)
+        for name, version in lists.items()
+    }
+    assert imported_lists(tmp_path, bundle) == lists
+    for name, version in lists.items():
+        ext = settings.SANCTIONS_SOURCES[name]["ext"]
+        path = tmp_path / "lists" / f"{name}{ext}"
+        assert path.read_text(encoding="utf-8") == SOURCES[name]
+        compiled = get_cached_candidates(name, version)
+        assert compiled.names == exported[name].names
+        assert compiled.keys == exported[name].keys
+        assert compiled.phonetic_keys == exported[name].phonetic_keys
+    assert get_cached_candidates("EU-Tracker", lists["EU-Tracker"]).names == [
+        "Ромашка ООО",
+        "Severstal",
+    ]
+
+
+def test_snapshot_with_changed_list_is_rejected(tmp_path, lists):
+    bundle = tmp_path / "snapshot.tar.gz"
+    export_snapshot(bundle, lists)
+    rewrite_bundle(bundle, "sources/OFAC.csv", lambda data: data + b"3,X\n")
+    with pytest.raises(ValueError, match="Checksum mismatch for OFAC"):
+        imported_lists(tmp_path, bundle)
+
+
+@pytest.mark.parametrize("format_version", [1, 3, None])
+def test_snapshot_of_other_format_is_rejected(tmp_path, lists, format_version):
+    bundle = tmp_path / "snapshot.tar.gz"
+    export_snapshot(bundle, lists)
+    rewrite_bundle(
+        bundle,
+        "manifest.json",
+        change_manifest(format_version=format_version),
+    )
+    with pytest.raises(ValueError, match="Unsupported snapshot format"):
+        imported_lists(tmp_path, bundle)
+
+
+def test_keys_of_other_rules_are_rebuilt(tmp_path, lists):
+    bundle = tmp_path / "snapshot.tar.gz"
+    export_snapshot(bundle, lists)
+    rewrite_bundle(bundle, "manifest.json", change_manifest(key_version=0))
+
+    def stale_keys(data: bytes) -> bytes:
+        compiled = json.loads(data)
+        compiled["keys"] = [key.upper() for key in compiled["keys"]]
+        compiled["phonetic_keys"] = {"stale": compiled["keys"]}
+        return json.dumps(compiled).encode()
+
+    rewrite_bundle(bundle, "compiled/OFAC.json", stale_keys)
+    imported_lists(tmp_path, bundle)
+    compiled = get_cached_candidates("OFAC", lists["OFAC"])
+    rebuilt = compile_candidates(compiled.names)
+    assert compiled.keys == rebuilt.keys == ["romashka", "gazprom neft"]
+    assert compiled.phonetic_keys == rebuilt.phonetic_keys
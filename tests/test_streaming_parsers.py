@@ -0,0 +1,87 @@
+import pytest
+from src.utils.web_scraper import _load_csv, _stream_csv, load_candidates
+
+CSV_ROWS = [
+    "1,Alpha Trade,001,true,",
+    "2,Beta Oil,2,,7",
+    '3,"Gamma, Steel",,FALSE,',
+    "4,,x,True,8",
+    "5,Delta,5,,",
+]
+
+# (source name, extension, file content) for every parser branch
+FILES = [
+    ("OFAC", ".csv", "\n".join(CSV_ROWS).encode()),
+    ("EU", ".csv", "\n".join(CSV_ROWS).encode()),
+    ("OFAC", ".csv", "1,Société Générale,1\n2,Müller,\n".encode("latin1")),
+    (
+        "UK",
+        ".xml",
+        b"<Designations><Designation><Names><Name><Name6> Alpha Trade "
+        b"</Name6></Name><Name><Name6></Name6></Name></Names>"
+        b"<Name6>Not a name</Name6></Designation></Designations>",
+    ),
+    (
+        "UN",
+        ".xml",
+        b"<LIST><INDIVIDUALS><INDIVIDUAL><FIRST_NAME>Ivan</FIRST_NAME>"
+        b"<SECOND_NAME> Petrov </SECOND_NAME><INDIVIDUAL_ALIAS>"
+        b"<ALIAS_NAME>Vanya</ALIAS_NAME></INDIVIDUAL_ALIAS>"
+        b"<INDIVIDUAL_ALIAS><ALIAS_NAME> </ALIAS_NAME></INDIVIDUAL_ALIAS>"
+        b"</INDIVIDUAL><INDIVIDUAL><FIRST_NAME></FIRST_NAME>"
+        b"<SECOND_NAME>Sidorov</SECOND_NAME></INDIVIDUAL></INDIVIDUALS>"
+        b"</LIST>",
+    ),
+    (
+        "EU",
+        ".xml",
+        b"<export>\n  <entity><name>Alpha<b>Trade</b></name>\n"
+        b"  <name>Beta &amp; Co</name><!-- comment -->\n"
+        b"  <name><![CDATA[Gamma\r\nSteel]]></name>tail\n"
+        b"  <empty/></entity>\n</export>\n",
+    ),
+    (
+        "EU-Tracker",
+        ".html",
+        b'<ul><li><a title="Alpha">x</a><li><a title="Beta"></ul>'
+        b'<a title="Outside"><li><ul><a title="Not in li"></ul></li>'
+        b'<ul><li><a title>empty</a><a title="x" title="Last"></li></ul>'
+        b'<ul><li><p><a title="Closed li"></li></p><a title="No li"></ul>'
+        b'<ul><br><li><img title="Image"><a title="H&amp;I"/></li></ul>',
+    ),
+    (
+        "OTHER",
+        ".html",
+        "Alpha Trade\r\nBeta\x0bOil\n\nGamma Steel\rDelta".encode(),
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "source, ext, content",
+    FILES,
+    ids=[f"{source}{ext}" for source, ext, _ in FILES],
+)
+def test_streaming_parser_matches_in_memory_parser(
+    tmp_path, source, ext, content
+):
+    file = tmp_path / f"list{ext}"
+    file.write_bytes(content)
+    expected = load_candidates(file, source, ext)
+    assert expected
+    assert load_candidates(file, source, ext, streaming=True) == expected
+
+
+@pytest.mark.parametrize("source", ["OFAC", "EU"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_csv_column_types_are_inferred_over_all_chunks(
+    tmp_path, source, chunk_size
+):
+    file = tmp_path / "list.csv"
+    file.write_text("\n".join(CSV_ROWS), encoding="utf-8")
+    streamed = _stream_csv(file, source, chunk_size=chunk_size)
+    assert streamed == _load_csv(file, source)
+    if source == "EU":
+        # Empty cells and numbers in a column with them are read as floats
+        assert streamed[0] == "1 Alpha Trade 001 True nan"
+        assert streamed[1] == "2 Beta Oil 2 nan 7.0"
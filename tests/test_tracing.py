@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import queue
+import threading
+import contextvars
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.core import tracing
+from src.core.config import settings
+from src.core.tracing import span, start_job
+
+
+@pytest.fixture
+def collector():
+    """Local stand-in of an OTLP/HTTP collector, yields received bodies."""
+    received = queue.Queue()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.put((self.path, self.headers["Content-Type"], body))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_port}/v1/traces"
+    server.received = received
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def received_spans(collector, count: int) -> list[dict]:
+    spans = []
+    while len(spans) < count:
+        path, content_type, body = collector.received.get(timeout=10)
+        assert path == "/v1/traces"
+        assert content_type == "application/json"
+        (resource,) = json.loads(body)["resourceSpans"]
+        assert resource["resource"]["attributes"] == [
+            {"key": "service.name", "value": {"stringValue": "sanctions_bot"}}
+        ]
+        for scope in resource["scopeSpans"]:
+            spans.extend(scope["spans"])
+    return spans
+
+
+def test_spans_are_posted_to_an_otlp_collector(collector, monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_EXPORTER", "otlp")
+    monkeypatch.setattr(settings, "TRACE_OTLP_ENDPOINT", collector.url)
+    monkeypatch.setattr(tracing, "_exporter", None)
+
+    def job():
+        job_id = start_job()
+        with span("check_sanctions", report_format="csv", rows=3):
+            with pytest.raises(ValueError):
+                with span("parse", source="OFAC", ratio=0.5, cached=True):
+                    raise ValueError("broken list")
+        return job_id
+
+    job_id = contextvars.Context().run(job)
+    check, parse = sorted(
+        received_spans(collector, 2), key=lambda s: s["name"]
+    )
+    assert check["traceId"] == parse["traceId"] == job_id
+    assert parse["parentSpanId"] == check["spanId"]
+    assert check["parentSpanId"] == ""
+    assert len(check["spanId"]) == 16
+    assert check["status"] == {"code": 1}
+    assert parse["status"] == {"code": 2}
+    assert int(check["startTimeUnixNano"]) <= int(parse["startTimeUnixNano"])
+    assert int(parse["endTimeUnixNano"]) <= int(check["endTimeUnixNano"])
+    assert check["attributes"] == [
+        {"key": "report_format", "value": {"stringValue": "csv"}},
+        {"key": "rows", "value": {"intValue": "3"}},
+    ]
+    assert parse["attributes"] == [
+        {"key": "source", "value": {"stringValue": "OFAC"}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+        {"key": "cached", "value": {"boolValue": True}},
+        {
+            "key": "error",
+            "value": {"stringValue": "ValueError('broken list')"},
+        },
+    ]
+
+
+def test_spans_outside_a_job_start_their_own_trace(monkeypatch):
+    records = []
+    monkeypatch.setattr(tracing, "_export", records.append)
+
+    def export():
+        for source in ("OFAC", "EU"):
+            with span("export_snapshot"):
+                with span("parse", source=source):
+                    pass
+
+    contextvars.Context().run(export)
+    parse_ofac, export_ofac, parse_eu, export_eu = records
+    assert parse_ofac["trace_id"] == export_ofac["trace_id"]
+    assert parse_eu["trace_id"] == export_eu["trace_id"]
+    assert export_ofac["trace_id"] != export_eu["trace_id"]
+    for record in records:
+        assert len(record["trace_id"]) == 32
+        assert record["trace_id"] != "0" * 32
+
+
+def test_span_file_is_rotated_and_cleaned_up(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    exporter = tracing._FileExporter(str(path))
+    old = path.with_name("spans.jsonl.2020-01-01")
+    old.write_text("{}\n")
+    month_ago = time.time() - 31 * 86400
+    os.utime(old, (month_ago, month_ago))
+    exporter.export({"name": "first"})
+    exporter._handler.doRollover()
+    exporter.export({"name": "second"})
+    exporter._handler.close()
+    assert not old.exists()
+    assert json.loads(path.read_text()) == {"name": "second"}
+    (rotated,) = set(path.parent.iterdir()) - {path}
+    assert json.loads(rotated.read_text()) == {"name": "first"}
@@ -0,0 +1,152 @@
+"""
+Tests of the Postgres backend against the database of docker-compose
+(DB_* settings, port 5433 by default). A temporary database is created
+and migrated for the module; the tests are skipped without a server.
+"""
+
+import os
+import sys
+import uuid
+import random
+import asyncio
+import subprocess
+from pathlib import Path
+import asyncpg
+import pytest
+from sqlalchemy import pool, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from src.core.config import settings
+from src.db.operations import SanctionEntryDAO
+from src.services.trigram_backend import load_source, match_source
+from src.utils.web_scraper import compile_candidates, match_companies
+from testkit import random_name, variant
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Spellings of listed names in uploads
+UPLOAD_VARIANTS = ("typo", "order", "form", "cyrillic", "fewer", "extended")
+
+
+async def _admin(query: str):
+    connection = await asyncpg.connect(
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        database="postgres",
+        timeout=3,
+    )
+    try:
+        await connection.execute(query)
+    finally:
+        await connection.close()
+
+
+@pytest.fixture(scope="module")
+def sessionmaker():
+    name = f"sanctions_test_{uuid.uuid4().hex[:8]}"
+    try:
+        asyncio.run(_admin(f'CREATE DATABASE "{name}"'))
+    except (OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Postgres is not available: {e}")
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "alembic", "upgrade", "head"],
+            cwd=REPO_ROOT,
+            env={**os.environ, "DB_NAME": name},
+            check=True,
+            capture_output=True,
+        )
+        engine = create_async_engine(
+            f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}"
+            f"@{settings.DB_HOST}:{settings.DB_PORT}/{name}",
+            poolclass=pool.NullPool,
+        )
+        yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    finally:
+        asyncio.run(_admin(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+
+
+def listed_name(rng: random.Random) -> str:
+    return random_name(rng, words=(2, 3), syllables=(2, 3), legal_forms=[])
+
+
+def write_list(path: Path, names: list[str]):
+    path.write_text("\n".join(names) + "\n", encoding="utf-8")
+
+
+async def count_entries(session, source: str) -> int:
+    result = await session.execute(
+        text("SELECT count(*) FROM sanction_entry WHERE source = :source"),
+        {"source": source},
+    )
+    return result.scalar_one()
+
+
+def test_migration_creates_trigram_indexes(sessionmaker):
+    async def scenario():
+        async with sessionmaker() as session:
+            extensions = await session.execute(
+                text("SELECT extname FROM pg_extension")
+            )
+            indexes = await session.execute(
+                text(
+                    "SELECT indexname FROM pg_indexes "
+                    "WHERE tablename = 'sanction_entry'"
+                )
+            )
+            return set(extensions.scalars()), set(indexes.scalars())
+
+    extensions, indexes = asyncio.run(scenario())
+    assert "pg_trgm" in extensions
+    assert {
+        "ix_sanction_entry_source",
+        "ix_sanction_entry_name_lower_trgm",
+        "ix_sanction_entry_match_key_trgm",
+    } <= indexes
+
+
+def test_replace_source_and_version_skip(sessionmaker, tmp_path):
+    file = tmp_path / "list.html"
+
+    async def scenario():
+        async with sessionmaker() as session:
+            write_list(file, ["Alpha Trade", "Beta Oil", "Alpha Trade"])
+            await load_source(session, "TEST", "v1", file, ".html")
+            first = await count_entries(session, "TEST")
+            # The same version is not parsed again, even if the file changed
+            write_list(file, ["Gamma Steel"])
+            await load_source(session, "TEST", "v1", file, ".html")
+            skipped = await count_entries(session, "TEST")
+            await load_source(session, "TEST", "v2", file, ".html")
+            replaced = await count_entries(session, "TEST")
+            version = await SanctionEntryDAO.get_list_version(session, "TEST")
+            return first, skipped, replaced, version
+
+    assert asyncio.run(scenario()) == (2, 2, 1, "v2")
+
+
+def test_trigram_shortlist_recall_against_memory_backend(
+    sessionmaker, tmp_path
+):
+    rng = random.Random(3)
+    listed = [listed_name(rng) for _ in range(2000)]
+    companies = [
+        variant(rng.choice(listed), rng, UPLOAD_VARIANTS) for _ in range(200)
+    ] + [listed_name(rng) for _ in range(200)]
+    file = tmp_path / "list.html"
+    write_list(file, listed)
+    threshold = settings.MATCH_THRESHOLD
+
+    async def scenario():
+        async with sessionmaker() as session:
+            await load_source(session, "RECALL", "v1", file, ".html")
+            return await match_source(session, "RECALL", companies, threshold)
+
+    found = set(asyncio.run(scenario()))
+    expected = set(
+        match_companies(companies, compile_candidates(listed), threshold)
+    )
+    recall = len(found & expected) / len(expected)
+    assert len(expected) >= 150
+    assert found <= expected
+    assert recall == 1, f"Trigram recall {recall:.3f}: {expected - found}"